@@ -1,10 +1,11 @@
 """
 Configuration management for the UHC Insurance Chatbot API
 """
-import os
+from functools import lru_cache
 from pathlib import Path
 from typing import List
-from pydantic_settings import BaseSettings
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -16,35 +17,37 @@ class Settings(BaseSettings):
     # Application
     APP_NAME: str = "UHC Insurance Policy Chatbot API"
     APP_VERSION: str = "1.0.0"
-    APP_ENV: str = os.getenv("APP_ENV", "development")
-    DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    APP_ENV: str = "development"
+    DEBUG: bool = True
+    LOG_LEVEL: str = "INFO"
 
     # API
-    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    ADMIN_TOKEN: str = ""  # Required (X-Admin-Token header) by admin endpoints; empty disables them
 
     # CORS - accepts comma-separated string from env or uses default
-    _cors_origins_raw: str = os.getenv("CORS_ORIGINS", "")
+    CORS_ORIGINS_RAW: str = Field(default="", validation_alias="CORS_ORIGINS")
 
     @property
     def CORS_ORIGINS(self) -> List[str]:
         """Parse CORS_ORIGINS from comma-separated string or use defaults"""
-        if self._cors_origins_raw:
+        if self.CORS_ORIGINS_RAW:
             # Split by comma and strip whitespace
-            return [origin.strip() for origin in self._cors_origins_raw.split(",") if origin.strip()]
+            return [origin.strip() for origin in self.CORS_ORIGINS_RAW.split(",") if origin.strip()]
         return [
             "http://localhost:3000",
             "http://127.0.0.1:3000",
         ]
 
-    # ChromaDB - use Field with default_factory for proper Pydantic env loading
+    # ChromaDB
     CHROMA_PERSIST_DIRECTORY: str = str(Path(__file__).parent.parent / "chroma_data")
     CHROMA_COLLECTION_NAME: str = "insurance_policies"
+    CHROMA_PROVIDER_INDEX_FILE: str = "providers.json"  # Written by data_pipeline loaders
 
     # LiteLLM Proxy (from llmops_lite)
-    LITELLM_PROXY_BASE_URL: str = os.getenv("LITELLM_PROXY_BASE_URL", "")
-    LITELLM_PROXY_SECRET_KEY: str = os.getenv("LITELLM_PROXY_SECRET_KEY", "")
+    LITELLM_PROXY_BASE_URL: str = ""
+    LITELLM_PROXY_SECRET_KEY: str = ""
 
     # LLM Settings
     DEFAULT_MODEL: str = "azure-gpt-5-mini"  # Using Azure GPT model from LiteLLM proxy
@@ -58,6 +61,7 @@ class Settings(BaseSettings):
     # Input Validation
     MAX_QUESTION_LENGTH: int = 500
     MIN_QUESTION_LENGTH: int = 5
+    MAX_BATCH_QUESTIONS: int = 10  # Max questions per /api/ask/batch request
 
     # Confidence Thresholds
     LOW_CONFIDENCE_THRESHOLD: float = 0.5
@@ -66,13 +70,31 @@ class Settings(BaseSettings):
     ENABLE_CACHE: bool = True
     CACHE_TTL: int = 86400  # 24 hours
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-        extra = "ignore"  # Allow extra fields in .env that aren't defined here
+    # Feedback (appended as JSON lines by a background writer)
+    FEEDBACK_LOG_PATH: str = str(Path(__file__).parent.parent / "data" / "feedback.jsonl")
+
+    @field_validator("DEBUG", mode="before")
+    @classmethod
+    def empty_debug_is_false(cls, v):
+        """Treat an empty DEBUG (common in .env templates) as False"""
+        if isinstance(v, str) and not v.strip():
+            return False
+        return v
+
+    # Every field is read from the environment variable of the same name
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        extra="ignore"  # Allow extra fields in .env that aren't defined here
+    )
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings instance (environment parsed once)"""
+    return Settings()
 
 # Create settings instance
-settings = Settings()
+settings = get_settings()
 
 # Validate critical settings
 if not settings.LITELLM_PROXY_BASE_URL or not settings.LITELLM_PROXY_SECRET_KEY:
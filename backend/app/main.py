@@ -8,15 +8,27 @@ Integrates:
 - Automatic caching and fallbacks
 """
 
+import re
+import secrets
 import sys
+import hashlib
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
-from fastapi import FastAPI, HTTPException, status
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from cachetools import TTLCache
+from cachetools.func import ttl_cache
+import orjson
+import httpx
 import chromadb
+from chromadb.utils import embedding_functions
 # ChromaDB imports handled via chromadb.PersistentClient
-from datetime import datetime
 from openai import OpenAI
 
 # Add llmops_lite to path (assuming it's in parent directory)
@@ -41,42 +53,40 @@ except ImportError as e:
 from app.config import settings
 from app.models import (
     QueryRequest, QueryResponse, PolicySource,
-    HealthResponse, ErrorResponse, FeedbackRequest, FeedbackResponse
+    HealthResponse, ErrorResponse, FeedbackRequest, FeedbackResponse,
+    refresh_timestamp_cache, clear_timestamp_cache, _now_iso
 )
 from app.validators import InputValidator
 
-# Initialize FastAPI app
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
-    description="AI-powered chatbot for UHC insurance policy queries",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # Global instances
 llm_manager = None
 fallback_llm_client = None
 chroma_client = None
 policy_collection = None
+policy_collections: Dict[str, "chromadb.Collection"] = {}  # provider -> dedicated collection
+embedding_function = None  # Same default model ChromaDB uses at ingestion
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    global llm_manager, fallback_llm_client, chroma_client, policy_collection
+# Connection pool for the LiteLLM proxy, sized for concurrent /api/ask requests
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
 
-    print("\n" + "="*80)
-    print("INITIALIZING UHC INSURANCE CHATBOT API")
-    print("="*80)
+# Full /api/ask responses keyed by (provider, normalized question)
+# (written from the streaming endpoint's worker thread too, so access is locked)
+_answer_cache: TTLCache = TTLCache(maxsize=1024, ttl=settings.CACHE_TTL)
+_answer_cache_lock = threading.Lock()
+
+# Cached /api/providers payload (rebuilt on startup, TTL expiry or refresh)
+_providers_cache: List[Dict] = []
+_providers_cache_ts: float = 0.0
+
+# Feedback is queued by /api/feedback and written in batches by a background task
+feedback_queue: Optional[asyncio.Queue] = None
+_FEEDBACK_QUEUE_MAXSIZE = 10_000
+_FEEDBACK_BATCH_SIZE = 100
+_FEEDBACK_FLUSH_INTERVAL = 1.0  # Seconds to wait for more entries before writing
+
+def _init_llm():
+    """Initialize llmops_lite, or the fallback OpenAI client for the LiteLLM proxy"""
+    global llm_manager, fallback_llm_client
 
     # Initialize llmops_lite
     if LLMOPS_AVAILABLE:
@@ -94,15 +104,27 @@ async def startup_event():
         try:
             fallback_llm_client = OpenAI(
                 api_key=settings.LITELLM_PROXY_SECRET_KEY,
-                base_url=settings.LITELLM_PROXY_BASE_URL
+                base_url=settings.LITELLM_PROXY_BASE_URL,
+                # One keep-alive pool shared by every request (and the to_thread workers)
+                http_client=httpx.Client(limits=LLM_HTTP_LIMITS)
             )
             print(f"✅ Fallback LLM client initialized (LiteLLM proxy)")
         except Exception as e:
             print(f"❌ Error initializing fallback LLM client: {e}")
             fallback_llm_client = None
 
-    # Initialize ChromaDB with retry logic
-    import time
+def _close_llm():
+    """Close the fallback LLM client's connection pool"""
+    global fallback_llm_client
+
+    if fallback_llm_client is not None:
+        fallback_llm_client.close()
+        fallback_llm_client = None
+
+def _init_chroma():
+    """Initialize ChromaDB with retry logic"""
+    global chroma_client, policy_collection
+
     max_retries = 3
     retry_delay = 2
 
@@ -144,8 +166,147 @@ async def startup_event():
                 chroma_client = None
                 policy_collection = None
 
+def _warm_provider_cache():
+    """Build the providers cache and open the per-provider collections"""
+    global policy_collections, _providers_cache, _providers_cache_ts
+
+    if not policy_collection:
+        return
+
+    # Warm the providers cache so /api/providers never scans on request
+    try:
+        _providers_cache = _build_providers_list()
+        _providers_cache_ts = time.time()
+        print(f"✅ Providers cache warmed: {[p['value'] for p in _providers_cache]}")
+    except Exception as e:
+        print(f"⚠️  Warning: could not warm providers cache: {e}")
+
+    # Per-provider collections (written by both data_pipeline loaders) avoid
+    # a metadata-filtered search; providers without one use the filter
+    try:
+        collection_names = {c.name for c in chroma_client.list_collections()}
+        policy_collections = {}
+        for provider_info in _providers_cache:
+            provider = provider_info['value']
+            name = _provider_collection_name(provider)
+            if name in collection_names:
+                policy_collections[provider] = chroma_client.get_collection(name=name)
+        print(f"   Provider collections: {sorted(policy_collections)}")
+    except Exception as e:
+        print(f"⚠️  Warning: could not open provider collections: {e}")
+        policy_collections = {}
+
+def _init_embeddings():
+    """Load the query embedding model and run it once so the first request doesn't"""
+    global embedding_function
+
+    try:
+        # Embed questions ourselves so queries pass query_embeddings
+        embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        embedding_function(["warmup"])
+        print("✅ Embedding model loaded")
+    except Exception as e:
+        print(f"⚠️  Warning: could not load embedding model: {e}")
+        print("   Queries will pass query_texts (embedded by ChromaDB)")
+        embedding_function = None
+
+def _init_retrieval():
+    """ChromaDB first, then the caches that depend on it"""
+    _init_chroma()
+    _warm_provider_cache()
+
+async def _tick_timestamp():
+    """Refresh the shared response timestamp once per second"""
+    while True:
+        refresh_timestamp_cache()
+        await asyncio.sleep(1)
+
+def _write_feedback(entries: List[Dict]):
+    """Append feedback entries to the feedback log as JSON lines (blocking)"""
+    log_path = Path(settings.FEEDBACK_LOG_PATH)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'ab') as f:
+        f.write(b"".join(orjson.dumps(entry) + b"\n" for entry in entries))
+
+async def _feedback_writer(queue: asyncio.Queue):
+    """Drain the feedback queue, writing up to _FEEDBACK_BATCH_SIZE entries per write"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + _FEEDBACK_FLUSH_INTERVAL
+        while len(batch) < _FEEDBACK_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await asyncio.to_thread(_write_feedback, batch)
+            print(f"📝 Saved {len(batch)} feedback entries")
+        except Exception as e:
+            print(f"❌ Error saving feedback: {e}")
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup (independent services in parallel)"""
+    print("\n" + "="*80)
+    print("INITIALIZING UHC INSURANCE CHATBOT API")
+    print("="*80)
+
+    await asyncio.gather(
+        asyncio.to_thread(_init_llm),
+        asyncio.to_thread(_init_retrieval),
+        asyncio.to_thread(_init_embeddings),
+    )
+
     print("="*80 + "\n")
 
+    global feedback_queue
+
+    timestamp_task = asyncio.create_task(_tick_timestamp())
+    feedback_queue = asyncio.Queue(maxsize=_FEEDBACK_QUEUE_MAXSIZE)
+    feedback_task = asyncio.create_task(_feedback_writer(feedback_queue))
+
+    yield
+
+    # Flush queued feedback before stopping the writer
+    try:
+        await asyncio.wait_for(feedback_queue.join(), timeout=5)
+    except asyncio.TimeoutError:
+        print(f"⚠️  Warning: {feedback_queue.qsize()} feedback entries not saved")
+    feedback_task.cancel()
+    feedback_queue = None
+
+    timestamp_task.cancel()
+    clear_timestamp_cache()
+    _close_llm()
+
+# Initialize FastAPI app
+app = FastAPI(
+    title=settings.APP_NAME,
+    version=settings.APP_VERSION,
+    description="AI-powered chatbot for UHC insurance policy queries",
+    docs_url="/docs",
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint"""
@@ -161,12 +322,7 @@ async def health_check():
     """Health check endpoint for monitoring"""
 
     # Check ChromaDB
-    chroma_collections = 0
-    if chroma_client:
-        try:
-            chroma_collections = len(chroma_client.list_collections())
-        except:
-            pass
+    chroma_collections = _count_chroma_collections()
 
     # Get LLM proxy URL
     llm_proxy = settings.LITELLM_PROXY_BASE_URL or "Not configured"
@@ -183,7 +339,12 @@ async def get_providers():
     """
     Get list of available insurance providers dynamically from ChromaDB.
     This ensures frontend automatically shows new providers without code changes.
+
+    The list is served from an in-process cache built at startup and rebuilt
+    once it is older than CACHE_TTL (or on POST /api/providers/refresh).
     """
+    global _providers_cache, _providers_cache_ts
+
     if not policy_collection:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -191,34 +352,13 @@ async def get_providers():
         )
 
     try:
-        # Get all documents to extract unique providers
-        results = policy_collection.get()
-
-        # Extract unique providers from metadata
-        providers_set = set()
-        provider_info = {}
-
-        if results and results.get('metadatas'):
-            for metadata in results['metadatas']:
-                provider = metadata.get('provider')
-                if provider:
-                    providers_set.add(provider)
-                    # Store display name mapping
-                    if provider not in provider_info:
-                        provider_info[provider] = {
-                            'value': provider,
-                            'label': provider,
-                            'display_name': metadata.get('provider', provider)
-                        }
-
-        # Convert to sorted list
-        providers_list = sorted([
-            provider_info[p] for p in providers_set
-        ], key=lambda x: x['value'])
+        if time.time() - _providers_cache_ts >= settings.CACHE_TTL:
+            _providers_cache = await asyncio.to_thread(_build_providers_list)
+            _providers_cache_ts = time.time()
 
         return {
-            "providers": providers_list,
-            "count": len(providers_list)
+            "providers": _providers_cache,
+            "count": len(_providers_cache)
         }
 
     except Exception as e:
@@ -227,6 +367,43 @@ async def get_providers():
             detail=f"Error fetching providers: {str(e)}"
         )
 
+@app.post("/api/providers/refresh", tags=["Query"], include_in_schema=False)
+async def refresh_providers(x_admin_token: Optional[str] = Header(None)):
+    """
+    Force a rebuild of the cached provider list (e.g. after loading new data)
+
+    Admin only: requires the X-Admin-Token header to match ADMIN_TOKEN.
+    """
+    global _providers_cache, _providers_cache_ts
+
+    if not settings.ADMIN_TOKEN or not secrets.compare_digest(
+        (x_admin_token or "").encode(), settings.ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
+
+    if not policy_collection:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ChromaDB not initialized"
+        )
+
+    try:
+        _providers_cache = await asyncio.to_thread(_build_providers_list)
+        _providers_cache_ts = time.time()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error refreshing providers: {str(e)}"
+        )
+
+    return {
+        "providers": _providers_cache,
+        "count": len(_providers_cache)
+    }
+
 @app.post("/api/ask", response_model=QueryResponse, tags=["Query"])
 async def ask_question(request: QueryRequest):
     """
@@ -240,6 +417,156 @@ async def ask_question(request: QueryRequest):
     """
 
     # Check if services are available
+    _ensure_services_available()
+
+    try:
+        # === STEPS 1-4: VALIDATE, RETRIEVE, FORMAT CONTEXT, CREATE PROMPT ===
+        prepared = await _prepare_question(request)
+
+        # === STEPS 5-7: EXECUTE LLM REQUEST, CALCULATE CONFIDENCE, RETURN RESPONSE ===
+        return await _answer_prepared(prepared)
+
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/api/ask/batch", response_model=List[QueryResponse], tags=["Query"])
+async def ask_questions_batch(requests: List[QueryRequest]):
+    """
+    Answer several questions in one request
+
+    Responses are returned in request order. Each distinct question is
+    embedded once, so asking the same question for several providers
+    shares one embedding; retrieval and LLM calls for the items run
+    concurrently.
+    """
+
+    # Check if services are available
+    _ensure_services_available()
+
+    if not requests:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one question is required"
+        )
+
+    if len(requests) > settings.MAX_BATCH_QUESTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_QUESTIONS} questions per batch"
+        )
+
+    try:
+        # Embed every distinct (sanitized) question in a single call
+        questions = set()
+        for request in requests:
+            try:
+                validated = InputValidator.validate_and_prepare(request.question, request.provider)
+            except ValueError:
+                continue  # _prepare_question reports the error below
+            if validated['is_relevant']:
+                questions.add(validated['question'])
+
+        embeddings = {}
+        if questions and embedding_function is not None:
+            questions = list(questions)
+            vectors = await asyncio.to_thread(embedding_function, questions)
+            embeddings = dict(zip(questions, vectors))
+
+        prepared_items = await asyncio.gather(*(
+            _prepare_question(request, embeddings=embeddings) for request in requests
+        ))
+
+        return await asyncio.gather(*(_answer_prepared(prepared) for prepared in prepared_items))
+
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/api/ask/stream", tags=["Query"])
+async def ask_question_stream(request: QueryRequest):
+    """
+    Streaming variant of /api/ask using Server-Sent Events
+
+    Emits `data: {"token": ...}` events while the LLM generates the answer,
+    then a single `event: done` event with the rest of the QueryResponse
+    (sources, confidence, provider, cached, timestamp). Failures after the
+    stream has started are reported as an `event: error` event.
+    """
+
+    # Check if services are available
+    _ensure_services_available()
+
+    try:
+        prepared = await _prepare_question(request)
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+    if 'response' in prepared:
+        events = _stream_complete_response(prepared['response'])
+    else:
+        events = _stream_answer(prepared)
+
+    # Sync generator: Starlette iterates it in a worker thread
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.post("/api/feedback", response_model=FeedbackResponse, tags=["Feedback"])
+async def submit_feedback(request: FeedbackRequest):
+    """
+    Submit user feedback on chatbot responses
+
+    This can be used to improve the system over time. Feedback is queued
+    and appended to FEEDBACK_LOG_PATH in batches by a background task, so
+    the request never waits on disk I/O.
+    """
+    if feedback_queue is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Feedback service not available"
+        )
+
+    try:
+        feedback_queue.put_nowait({
+            **request.model_dump(),
+            "received_at": _now_iso()
+        })
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Feedback queue is full. Please try again later."
+        )
+
+    return FeedbackResponse(
+        success=True,
+        message="Thank you for your feedback! We'll use it to improve the chatbot."
+    )
+
+# Helper functions
+
+_LOW_CONFIDENCE_NOTE = (
+    "\n\n⚠️ Note: I have low confidence in this answer. "
+    "Please verify this information with UHC directly or consult the policy documents."
+)
+
+def _ensure_services_available():
+    """Raise 503 if ChromaDB or the LLM backend is not initialized"""
     if not policy_collection:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -252,83 +579,128 @@ async def ask_question(request: QueryRequest):
             detail="LLM service not available. Please check LLM configuration."
         )
 
+async def _prepare_question(
+    request: QueryRequest,
+    embeddings: Optional[Dict[str, List[float]]] = None
+) -> Dict:
+    """
+    Validate the question, retrieve policy chunks and build the LLM prompt
+
+    Shared by /api/ask, /api/ask/batch and /api/ask/stream.
+
+    Args:
+        request: The incoming question
+        embeddings: Precomputed embeddings keyed by sanitized question
+            (batch requests); missing questions are embedded here
+
+    Returns:
+        Either {'response': QueryResponse} when no LLM call is needed
+        (cache hit, non-medical question, no matching policies), or a dict
+        with question, provider, cache_key, context, context_chunks,
+        sources and prompt.
+
+    Raises:
+        HTTPException: On invalid input or vector search failure
+    """
+    # === STEP 1: VALIDATE INPUT ===
     try:
-        # === STEP 1: VALIDATE INPUT ===
-        try:
-            validated = InputValidator.validate_and_prepare(
-                request.question,
-                request.provider
-            )
-        except ValueError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
-            )
+        validated = InputValidator.validate_and_prepare(
+            request.question,
+            request.provider
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
-        question = validated['question']
-        provider = validated['provider']
-        is_relevant = validated['is_relevant']
-        relevance_score = validated['relevance_score']
-
-        # EDGE CASE: Non-medical question
-        if not is_relevant:
-            return QueryResponse(
-                answer=(
-                    "I can only answer questions about UHC insurance policies and medical coverage. "
-                    "Please ask about procedures, coverage criteria, or claim denials."
-                ),
-                sources=[],
-                confidence=0.0,
-                provider=provider,
-                cached=False
-            )
+    question = validated['question']
+    provider = validated['provider']
+    is_relevant = validated['is_relevant']
+
+    # Repeated question: skip retrieval and the LLM round-trip entirely
+    cache_key = (provider, question.lower())
+    if settings.ENABLE_CACHE:
+        with _answer_cache_lock:
+            cached_response = _answer_cache.get(cache_key)
+        if cached_response is not None:
+            return {'response': cached_response.model_copy(update={"cached": True})}
+
+    # EDGE CASE: Non-medical question
+    if not is_relevant:
+        return {'response': QueryResponse(
+            answer=(
+                "I can only answer questions about UHC insurance policies and medical coverage. "
+                "Please ask about procedures, coverage criteria, or claim denials."
+            ),
+            sources=[],
+            confidence=0.0,
+            provider=provider,
+            cached=False
+        )}
 
-        # === STEP 2: RETRIEVE FROM CHROMADB ===
-        try:
-            results = policy_collection.query(
-                query_texts=[question],
+    # === STEP 2: RETRIEVE FROM CHROMADB ===
+    try:
+        # Embedding and vector search are blocking - run them in a thread
+        query_embedding = embeddings.get(question) if embeddings else None
+        if query_embedding is None and embedding_function is not None:
+            query_embedding = await asyncio.to_thread(_embed_question, question)
+
+        if query_embedding is not None:
+            query = {"query_embeddings": [query_embedding]}
+        else:
+            query = {"query_texts": [question]}  # No embedder loaded: ChromaDB embeds it
+
+        provider_collection = policy_collections.get(provider)
+        if provider_collection is not None:
+            results = await asyncio.to_thread(
+                provider_collection.query,
+                **query,
+                n_results=settings.TOP_K_RESULTS
+            )
+        else:
+            results = await asyncio.to_thread(
+                policy_collection.query,
+                **query,
                 n_results=settings.TOP_K_RESULTS,
                 where={"provider": provider}  # Filter by provider
             )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Vector search error: {str(e)}"
-            )
-
-        # EDGE CASE: No relevant policies found
-        if not results['documents'] or len(results['documents'][0]) == 0:
-            return QueryResponse(
-                answer=(
-                    f"I couldn't find relevant {provider} policies for your question. "
-                    "Please try rephrasing or contact UHC directly for clarification."
-                ),
-                sources=[],
-                confidence=0.0,
-                provider=provider,
-                cached=False
-            )
-
-        # === STEP 3: FORMAT CONTEXT ===
-        context_chunks = results['documents'][0]
-        context = "\n\n".join([
-            f"Policy Excerpt {i+1}:\n{chunk}"
-            for i, chunk in enumerate(context_chunks)
-        ])
-
-        # Extract sources
-        sources = [
-            PolicySource(
-                policy_id=meta.get('policy_id', 'unknown'),
-                title=meta.get('title', 'Unknown Policy'),
-                url=meta.get('source_url', ''),
-                excerpt=doc[:200] + "..." if len(doc) > 200 else doc
-            )
-            for meta, doc in zip(results['metadatas'][0], results['documents'][0])
-        ]
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Vector search error: {str(e)}"
+        )
 
-        # === STEP 4: CREATE PROMPT ===
-        prompt_template = f"""You are an expert medical billing assistant specializing in insurance policies.
+    # EDGE CASE: No relevant policies found
+    if not results['documents'] or len(results['documents'][0]) == 0:
+        return {'response': QueryResponse(
+            answer=(
+                f"I couldn't find relevant {provider} policies for your question. "
+                "Please try rephrasing or contact UHC directly for clarification."
+            ),
+            sources=[],
+            confidence=0.0,
+            provider=provider,
+            cached=False
+        )}
+
+    # === STEP 3: FORMAT CONTEXT ===
+    # Build the prompt context and the source citations in one pass
+    context_chunks = results['documents'][0]
+    context_parts = []
+    sources = []
+    for i, (doc, meta) in enumerate(zip(context_chunks, results['metadatas'][0])):
+        context_parts.append(f"Policy Excerpt {i+1}:\n{doc}")
+        sources.append(PolicySource(
+            policy_id=meta.get('policy_id', 'unknown'),
+            title=meta.get('title', 'Unknown Policy'),
+            url=meta.get('source_url', ''),
+            excerpt=doc if len(doc) <= 200 else doc[:200] + "..."
+        ))
+    context = "\n\n".join(context_parts)
+
+    # === STEP 4: CREATE PROMPT ===
+    prompt_template = f"""You are an expert medical billing assistant specializing in insurance policies.
 
 Context from {provider} Policies:
 {context}
@@ -345,139 +717,268 @@ Instructions:
 
 Answer:"""
 
-        # === STEP 5: EXECUTE LLM REQUEST ===
-        try:
-            if llm_manager:
-                # Use llmops_lite if available
-                insurance_prompt = Prompt(
-                    name="insurance_qa",
-                    description=f"Answer question about {provider} insurance policies",
-                    template=prompt_template
-                )
-
-                model_config = LLMModel.GPT_4O_MINI
-
-                payload = Payload(
-                    prompt=insurance_prompt,
-                    model=model_config.model_name,
-                    temperature=settings.DEFAULT_TEMPERATURE,
-                    datapoint_id=f"query_{hash(question)}",
-                    vars={"context": context, "question": question},
-                    extra_args={
-                        **model_config.extra_args,
-                        "max_tokens": settings.MAX_TOKENS,
-                        "process_output": False
-                    }
-                )
-
-                response = llm_manager.execute_llm_prompt(
-                    payload,
-                    use_cache=settings.ENABLE_CACHE
-                )
+    return {
+        'question': question,
+        'provider': provider,
+        'cache_key': cache_key,
+        'context': context,
+        'context_chunks': context_chunks,
+        'sources': sources,
+        'prompt': prompt_template
+    }
 
-                if hasattr(response, 'choices') and len(response.choices) > 0:
-                    answer = response.choices[0].message.content
-                else:
-                    answer = str(response)
+async def _answer_prepared(prepared: Dict) -> QueryResponse:
+    """
+    Run the LLM for a prepared question and build the scored response
 
-            else:
-                # Use fallback OpenAI client
-                response = fallback_llm_client.chat.completions.create(
-                    model=settings.DEFAULT_MODEL,
-                    messages=[
-                        {"role": "system", "content": "You are an expert medical billing assistant."},
-                        {"role": "user", "content": prompt_template}
-                    ],
-                    temperature=settings.DEFAULT_TEMPERATURE,
-                    max_tokens=settings.MAX_TOKENS
-                )
+    Passes through the early response when _prepare_question already
+    produced one (cache hit, non-medical question, no matching policies).
 
-                answer = response.choices[0].message.content
+    Raises:
+        HTTPException: If the LLM request fails
+    """
+    if 'response' in prepared:
+        return prepared['response']
 
-            cached = False
+    # Tokenize the context for confidence scoring while the LLM runs
+    context_tokens_task = asyncio.create_task(
+        asyncio.to_thread(tokenize_context, prepared['context_chunks'])
+    )
 
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"LLM execution error: {str(e)}"
-            )
+    try:
+        answer = await asyncio.to_thread(_generate_answer, prepared)
+    except Exception as e:
+        context_tokens_task.cancel()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"LLM execution error: {str(e)}"
+        )
 
-        # === STEP 6: CALCULATE CONFIDENCE ===
-        confidence = calculate_confidence(answer, context_chunks)
+    confidence = calculate_confidence(answer, await context_tokens_task)
+    return _build_response(prepared, answer, confidence)
+
+def _fallback_messages(prompt: str) -> List[Dict]:
+    """Chat messages for the fallback OpenAI client"""
+    return [
+        {"role": "system", "content": "You are an expert medical billing assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _generate_answer(prepared: Dict) -> str:
+    """Run the LLM request for a prepared question (blocking)"""
+    question = prepared['question']
+    provider = prepared['provider']
+
+    if llm_manager:
+        # Use llmops_lite if available
+        insurance_prompt = Prompt(
+            name="insurance_qa",
+            description=f"Answer question about {provider} insurance policies",
+            template=prepared['prompt']
+        )
 
-        # EDGE CASE: Low confidence answer
-        if confidence < settings.LOW_CONFIDENCE_THRESHOLD:
-            answer += (
-                "\n\n⚠️ Note: I have low confidence in this answer. "
-                "Please verify this information with UHC directly or consult the policy documents."
-            )
+        model_config = LLMModel.GPT_4O_MINI
+
+        payload = Payload(
+            prompt=insurance_prompt,
+            model=model_config.model_name,
+            temperature=settings.DEFAULT_TEMPERATURE,
+            datapoint_id=f"query_{_question_digest(question)}",
+            vars={"context": prepared['context'], "question": question},
+            extra_args={
+                **model_config.extra_args,
+                "max_tokens": settings.MAX_TOKENS,
+                "process_output": False
+            }
+        )
 
-        # === STEP 7: RETURN RESPONSE ===
-        return QueryResponse(
-            answer=answer,
-            sources=sources,
-            confidence=confidence,
-            provider=provider,
-            cached=cached
+        response = llm_manager.execute_llm_prompt(
+            payload,
+            use_cache=settings.ENABLE_CACHE
         )
 
-    except HTTPException:
-        raise  # Re-raise HTTP exceptions
+        if hasattr(response, 'choices') and len(response.choices) > 0:
+            return response.choices[0].message.content
+        return str(response)
+
+    # Use fallback OpenAI client
+    response = fallback_llm_client.chat.completions.create(
+        model=settings.DEFAULT_MODEL,
+        messages=_fallback_messages(prepared['prompt']),
+        temperature=settings.DEFAULT_TEMPERATURE,
+        max_tokens=settings.MAX_TOKENS
+    )
+
+    return response.choices[0].message.content
+
+def _build_response(prepared: Dict, answer: str, confidence: float) -> QueryResponse:
+    """Assemble (and cache) the final response for a generated answer"""
+    # EDGE CASE: Low confidence answer
+    if confidence < settings.LOW_CONFIDENCE_THRESHOLD:
+        answer += _LOW_CONFIDENCE_NOTE
+
+    response = QueryResponse(
+        answer=answer,
+        sources=prepared['sources'],
+        confidence=confidence,
+        provider=prepared['provider'],
+        cached=False
+    )
+
+    if settings.ENABLE_CACHE:
+        with _answer_cache_lock:
+            _answer_cache[prepared['cache_key']] = response
+
+    return response
+
+def _sse_event(data: Dict, event: Optional[str] = None) -> bytes:
+    """Encode one Server-Sent Event"""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+def _stream_complete_response(response: QueryResponse) -> Iterator[bytes]:
+    """Stream an already complete response as one token plus the done event"""
+    yield _sse_event({"token": response.answer})
+    yield _sse_event(response.model_dump(exclude={"answer"}), event="done")
+
+def _stream_answer(prepared: Dict) -> Iterator[bytes]:
+    """Stream LLM tokens as they arrive, then confidence and sources"""
+    answer_parts = []
+
+    try:
+        if llm_manager:
+            # llmops_lite returns complete answers; send it as one token
+            answer = _generate_answer(prepared)
+            answer_parts.append(answer)
+            yield _sse_event({"token": answer})
+        else:
+            stream = fallback_llm_client.chat.completions.create(
+                model=settings.DEFAULT_MODEL,
+                messages=_fallback_messages(prepared['prompt']),
+                temperature=settings.DEFAULT_TEMPERATURE,
+                max_tokens=settings.MAX_TOKENS,
+                stream=True
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    answer_parts.append(token)
+                    yield _sse_event({"token": token})
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Internal server error: {str(e)}"
-        )
+        yield _sse_event({"message": f"LLM execution error: {str(e)}"}, event="error")
+        return
 
-@app.post("/api/feedback", response_model=FeedbackResponse, tags=["Feedback"])
-async def submit_feedback(request: FeedbackRequest):
+    answer = "".join(answer_parts)
+    confidence = calculate_confidence(answer, tokenize_context(prepared['context_chunks']))
+    response = _build_response(prepared, answer, confidence)
+
+    # Low confidence note appended by _build_response
+    if len(response.answer) > len(answer):
+        yield _sse_event({"token": response.answer[len(answer):]})
+
+    yield _sse_event(response.model_dump(exclude={"answer"}), event="done")
+
+@ttl_cache(maxsize=1, ttl=5)
+def _count_chroma_collections() -> int:
+    """Number of ChromaDB collections, re-checked at most every 5 seconds (health probes)"""
+    if not chroma_client:
+        return 0
+    try:
+        return len(chroma_client.list_collections())
+    except:
+        return 0
+
+def _provider_collection_name(provider: str) -> str:
+    """Name of the dedicated per-provider collection (written by the data_pipeline loaders)"""
+    return f"{settings.CHROMA_COLLECTION_NAME}__{provider}"
+
+def _question_digest(question: str) -> str:
+    """Stable (cross-process) short hash of a question, for LLMOps datapoint ids"""
+    return hashlib.blake2b(question.encode("utf-8"), digest_size=8).hexdigest()
+
+@lru_cache(maxsize=1024)
+def _embed_question_cached(question: str) -> Tuple[float, ...]:
+    """Memoized question embedding (immutable, so it is safe to share)"""
+    return tuple(embedding_function([question])[0])
+
+def _embed_question(question: str) -> List[float]:
     """
-    Submit user feedback on chatbot responses
+    Embed a question with the same embedding model used at ingestion
 
-    This can be used to improve the system over time
+    Repeated questions skip the model forward pass via an LRU cache.
     """
-    # In production, save feedback to database for analysis
-    # For now, just acknowledge receipt
+    return list(_embed_question_cached(question))
 
-    print(f"\nFeedback received:")
-    print(f"  Question: {request.question[:50]}...")
-    print(f"  Rating: {request.rating}/5")
-    print(f"  Comment: {request.comment}")
+def _build_providers_list() -> List[Dict]:
+    """
+    Build the sorted provider list
 
-    return FeedbackResponse(
-        success=True,
-        message="Thank you for your feedback! We'll use it to improve the chatbot."
-    )
+    Reads the provider index written by the data pipeline at ingestion time.
+    If the index is missing (e.g. data loaded by an older loader), falls back
+    to walking the metadata of every document in the collection.
+    """
+    provider_info = {}
+
+    index_file = Path(settings.CHROMA_PERSIST_DIRECTORY) / settings.CHROMA_PROVIDER_INDEX_FILE
+    if index_file.exists():
+        with open(index_file, 'rb') as f:
+            for provider in orjson.loads(f.read()):
+                provider_info[provider] = {
+                    'value': provider,
+                    'label': provider,
+                    'display_name': provider
+                }
+    else:
+        results = policy_collection.get(include=["metadatas"])
 
-# Helper functions
+        # Extract unique providers from metadata
+        if results and results.get('metadatas'):
+            for metadata in results['metadatas']:
+                provider = metadata.get('provider')
+                if provider and provider not in provider_info:
+                    # Store display name mapping
+                    provider_info[provider] = {
+                        'value': provider,
+                        'label': provider,
+                        'display_name': metadata.get('provider', provider)
+                    }
+
+    # Convert to sorted list
+    return sorted(provider_info.values(), key=lambda x: x['value'])
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'for', 'to', 'of',
+    'and', 'or', 'but', 'in', 'on', 'at', 'from', 'by', 'with', 'this',
+    'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
+})
 
-def calculate_confidence(answer: str, context_chunks: List[str]) -> float:
+def tokenize_context(context_chunks: List[str]) -> FrozenSet[str]:
+    """Lowercased word tokens of the retrieved context (for calculate_confidence)"""
+    return frozenset(_TOKEN_RE.findall(" ".join(context_chunks).lower()))
+
+def calculate_confidence(answer: str, context_tokens: FrozenSet[str]) -> float:
     """
     Calculate confidence score based on answer-context alignment
 
-    Simple heuristic: check if key terms from answer appear in context
+    Simple heuristic: check if key terms from answer appear in context.
+    The context is tokenized separately (tokenize_context) so that work can
+    overlap with the LLM call; scoring is then pure set intersections.
     """
     # Extract important words from answer (skip common words)
-    stop_words = {
-        'the', 'a', 'an', 'is', 'are', 'was', 'were', 'for', 'to', 'of',
-        'and', 'or', 'but', 'in', 'on', 'at', 'from', 'by', 'with', 'this',
-        'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
-    }
-
-    answer_words = set(answer.lower().split()) - stop_words
+    answer_words = set(map(sys.intern, _TOKEN_RE.findall(answer.lower()))) - _STOP_WORDS
 
     # Count how many answer words appear in context
-    context_text = " ".join(context_chunks).lower()
-    matches = sum(1 for word in answer_words if len(word) > 3 and word in context_text)
+    matches = len({word for word in answer_words if len(word) > 3} & context_tokens)
 
     # Calculate confidence (max 1.0)
     confidence = min(matches / max(len(answer_words), 1), 1.0) if answer_words else 0.5
 
     # Boost confidence if specific medical terms are present
-    medical_terms_in_answer = sum(
-        1 for word in answer_words
-        if word in InputValidator.MEDICAL_KEYWORDS
-    )
+    medical_terms_in_answer = len(answer_words & InputValidator.MEDICAL_KEYWORDS)
 
     if medical_terms_in_answer > 0:
         confidence = min(confidence * 1.2, 1.0)
@@ -489,13 +990,12 @@ def calculate_confidence(answer: str, context_chunks: List[str]) -> float:
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             error=exc.__class__.__name__,
-            message=exc.detail,
-            timestamp=datetime.utcnow().isoformat()
-        ).dict()
+            message=exc.detail
+        ).model_dump()
     )
 
 @app.exception_handler(Exception)
@@ -503,14 +1003,13 @@ async def general_exception_handler(request, exc):
     """Handle unexpected errors"""
     print(f"Unexpected error: {exc}")
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content=ErrorResponse(
             error="InternalServerError",
             message="An unexpected error occurred",
-            detail=str(exc) if settings.DEBUG else None,
-            timestamp=datetime.utcnow().isoformat()
-        ).dict()
+            detail=str(exc) if settings.DEBUG else None
+        ).model_dump()
     )
 
 if __name__ == "__main__":
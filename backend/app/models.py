@@ -1,16 +1,35 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from app.config import settings
+from app.validators import InputValidator
+
+# Coarse (1s resolution) ISO timestamp shared by all response models. The API
+# refreshes it from a background task; without one, a fresh value is used.
+_ts_cache: Optional[str] = None
+
+def refresh_timestamp_cache() -> None:
+    """Update the cached timestamp (called once per second by the API)"""
+    global _ts_cache
+    _ts_cache = datetime.utcnow().isoformat()
+
+def clear_timestamp_cache() -> None:
+    """Stop serving the cached timestamp (e.g. on shutdown)"""
+    global _ts_cache
+    _ts_cache = None
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, from the cache when it is maintained"""
+    return _ts_cache or datetime.utcnow().isoformat()
+
 class QueryRequest(BaseModel):
     """Request model for /api/ask endpoint"""
     question: str = Field(
         ...,
-        min_length=5,
-        max_length=500,
         description="User's question about insurance policies"
     )
     provider: Optional[str] = Field(
@@ -18,18 +37,30 @@ class QueryRequest(BaseModel):
         description="Insurance provider (e.g., 'UHC', 'Aetna')"
     )
 
-    @validator('question')
-    def question_not_empty(cls, v):
-        """Ensure question is not just whitespace"""
-        if not v.strip():
+    @field_validator('question', mode='after')
+    @classmethod
+    def validate_question(cls, v: str) -> str:
+        """
+        Strip whitespace and check length in one pass (rejects empty/whitespace-only)
+
+        Bounds come from settings.MIN_QUESTION_LENGTH / MAX_QUESTION_LENGTH.
+        """
+        v = v.strip()
+        length = len(v)
+        if length == 0:
             raise ValueError('Question cannot be empty')
-        return v.strip()
+        if length < settings.MIN_QUESTION_LENGTH:
+            raise ValueError(f'Question must be at least {settings.MIN_QUESTION_LENGTH} characters')
+        if length > settings.MAX_QUESTION_LENGTH:
+            raise ValueError(f'Question must be at most {settings.MAX_QUESTION_LENGTH} characters')
+        return v
 
-    @validator('provider')
-    def provider_uppercase(cls, v):
+    @field_validator('provider', mode='after')
+    @classmethod
+    def provider_uppercase(cls, v: Optional[str]) -> str:
         """Normalize provider to uppercase"""
         if v:
-            return v.upper()
+            return InputValidator.normalize_provider(v) or "UHC"
         return "UHC"
 
 class PolicySource(BaseModel):
@@ -54,7 +85,7 @@ class QueryResponse(BaseModel):
     )
     provider: str = Field(..., description="Insurance provider queried")
     timestamp: str = Field(
-        default_factory=lambda: datetime.utcnow().isoformat(),
+        default_factory=_now_iso,
         description="Response timestamp (ISO format)"
     )
     cached: bool = Field(
@@ -69,7 +100,7 @@ class HealthResponse(BaseModel):
     llm_proxy: str = Field(..., description="LLM proxy URL")
     chroma_collections: int = Field(..., description="Number of ChromaDB collections")
     timestamp: str = Field(
-        default_factory=lambda: datetime.utcnow().isoformat(),
+        default_factory=_now_iso,
         description="Health check timestamp (ISO format)"
     )
 
@@ -79,7 +110,7 @@ class ErrorResponse(BaseModel):
     message: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Additional details")
     timestamp: str = Field(
-        default_factory=lambda: datetime.utcnow().isoformat(),
+        default_factory=_now_iso,
         description="Error timestamp (ISO format)"
     )
 
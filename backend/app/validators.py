@@ -2,13 +2,24 @@
 Input validation and edge case handling
 """
 import re
-from typing import Optional, Tuple
+import sys
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from app.config import get_settings
+
+def _keywords_within(keywords: FrozenSet[str]) -> Dict[str, FrozenSet[str]]:
+    """Map each keyword to the keywords that are substrings of it"""
+    return {
+        keyword: frozenset(other for other in keywords if other in keyword)
+        for keyword in keywords
+    }
 
 class InputValidator:
     """Validates and sanitizes user input for edge cases"""
 
     # Medical/Insurance keywords for relevance checking
-    MEDICAL_KEYWORDS = {
+    MEDICAL_KEYWORDS: FrozenSet[str] = frozenset(map(sys.intern, {
         'insurance', 'coverage', 'policy', 'procedure', 'treatment',
         'claim', 'denial', 'reimbursement', 'prior authorization',
         'cpt', 'icd', 'diagnosis', 'medical', 'surgery', 'hospital',
@@ -19,7 +30,21 @@ class InputValidator:
         'bariatric', 'orthopedic', 'cardiology', 'oncology',
         'genetic', 'testing', 'imaging', 'mri', 'ct', 'scan',
         'therapy', 'rehabilitation', 'durable', 'equipment', 'dme'
-    }
+    }))
+
+    # Single alternation over all keywords (longest first) inside a lookahead,
+    # so the scan reports the longest keyword starting at every position.
+    # Case-sensitive: it runs on the lowercased question, so every match is a key
+    # of _KEYWORDS_WITHIN (IGNORECASE would also match e.g. 'ſ' for 's')
+    _MEDICAL_RE = re.compile(
+        r"(?=(" + "|".join(
+            map(re.escape, sorted(MEDICAL_KEYWORDS, key=len, reverse=True))
+        ) + "))"
+    )
+
+    # Keyword -> every keyword it contains (itself included), e.g. 'healthcare'
+    # also counts 'health', matching plain substring checks on the question
+    _KEYWORDS_WITHIN = _keywords_within(MEDICAL_KEYWORDS)
 
     # Injection attack patterns to block
     DANGEROUS_PATTERNS = [
@@ -35,6 +60,42 @@ class InputValidator:
         r'eval\(',
     ]
 
+    # All dangerous patterns unioned into one regex so a single search suffices
+    _DANGEROUS_RE = re.compile("|".join(DANGEROUS_PATTERNS), re.IGNORECASE)
+
+    _WHITESPACE_RE = re.compile(r'\s+')
+
+    # Provider name patterns (matched anywhere in the lowercased question)
+    _PROVIDER_PATTERNS = {
+        'UHC': ['uhc', 'united healthcare', 'unitedhealthcare', 'united health'],
+        'AETNA': ['aetna'],
+        'CIGNA': ['cigna'],
+        'BCBS': ['blue cross', 'bcbs', 'blue shield'],
+        'HUMANA': ['humana'],
+    }
+
+    _PROVIDER_BY_PATTERN = {
+        pattern: provider
+        for provider, patterns in _PROVIDER_PATTERNS.items()
+        for pattern in patterns
+    }
+
+    # Common spellings of each provider name -> canonical name, so the usual
+    # cases normalize with one dict lookup instead of strip() + upper()
+    _PROVIDER_ALIASES = {
+        alias: provider
+        for provider in _PROVIDER_PATTERNS
+        for alias in (provider, provider.lower(), provider.capitalize())
+    }
+
+    # One alternation over every pattern (longest first) -> single scan of the
+    # lowercased question (case-sensitive, so every match is a pattern key)
+    _PROVIDER_RE = re.compile(
+        "|".join(
+            map(re.escape, sorted(_PROVIDER_BY_PATTERN, key=len, reverse=True))
+        )
+    )
+
     @staticmethod
     def sanitize_input(question: str) -> str:
         """
@@ -52,28 +113,28 @@ class InputValidator:
         # Remove leading/trailing whitespace
         question = question.strip()
 
-        # Check length
-        if len(question) > 500:
+        # Check length (same bounds as QueryRequest)
+        settings = get_settings()
+        if len(question) > settings.MAX_QUESTION_LENGTH:
             raise ValueError(
-                "Question too long (maximum 500 characters). "
+                f"Question too long (maximum {settings.MAX_QUESTION_LENGTH} characters). "
                 "Please rephrase your question more concisely."
             )
 
-        if len(question) < 5:
+        if len(question) < settings.MIN_QUESTION_LENGTH:
             raise ValueError(
-                "Question too short (minimum 5 characters). "
+                f"Question too short (minimum {settings.MIN_QUESTION_LENGTH} characters). "
                 "Please provide more details."
             )
 
         # Check for dangerous patterns
-        for pattern in InputValidator.DANGEROUS_PATTERNS:
-            if re.search(pattern, question, re.IGNORECASE):
-                raise ValueError(
-                    "Invalid input detected. Please rephrase your question."
-                )
+        if InputValidator._DANGEROUS_RE.search(question):
+            raise ValueError(
+                "Invalid input detected. Please rephrase your question."
+            )
 
         # Remove excessive whitespace
-        question = re.sub(r'\s+', ' ', question)
+        question = InputValidator._WHITESPACE_RE.sub(' ', question)
 
         return question
 
@@ -90,13 +151,11 @@ class InputValidator:
             - is_medical: True if question is medical/insurance related
             - relevance_score: Confidence score (0.0 to 1.0)
         """
-        question_lower = question.lower()
-
-        # Count matching keywords
-        matches = sum(
-            1 for keyword in InputValidator.MEDICAL_KEYWORDS
-            if keyword in question_lower
-        )
+        # Count distinct keywords contained in the question, in a single pass
+        matches = len(set().union(*(
+            InputValidator._KEYWORDS_WITHIN[match.group(1)]
+            for match in InputValidator._MEDICAL_RE.finditer(question.lower())
+        )))
 
         # Calculate relevance score
         # At least 1 match = relevant
@@ -117,29 +176,34 @@ class InputValidator:
         Returns:
             Provider name (e.g., 'UHC', 'AETNA') or None
         """
-        question_lower = question.lower()
-
-        # Provider patterns
-        provider_patterns = {
-            'UHC': ['uhc', 'united healthcare', 'unitedhealthcare', 'united health'],
-            'AETNA': ['aetna'],
-            'CIGNA': ['cigna'],
-            'BCBS': ['blue cross', 'bcbs', 'blue shield'],
-            'HUMANA': ['humana'],
-        }
-
-        for provider, patterns in provider_patterns.items():
-            for pattern in patterns:
-                if pattern in question_lower:
-                    return provider
+        # First provider mentioned in the question wins
+        match = InputValidator._PROVIDER_RE.search(question.lower())
+        if match:
+            return InputValidator._PROVIDER_BY_PATTERN[match.group(0)]
 
         return None
 
+    @staticmethod
+    def normalize_provider(provider: str) -> str:
+        """
+        Normalize a provider name to its canonical uppercase form
+
+        Args:
+            provider: Provider name as given by the user (any casing)
+
+        Returns:
+            Canonical provider name (e.g., 'UHC', 'AETNA')
+        """
+        return InputValidator._PROVIDER_ALIASES.get(provider) or provider.strip().upper()
+
     @staticmethod
     def validate_and_prepare(question: str, provider: Optional[str] = None) -> dict:
         """
         Complete validation and preparation pipeline
 
+        Results are memoized per (question, provider), so repeated questions
+        (retries, page refreshes) skip sanitizing and keyword matching.
+
         Args:
             question: Raw user input
             provider: Optional provider override
@@ -155,43 +219,71 @@ class InputValidator:
         Raises:
             ValueError: If input is invalid
         """
-        warnings = []
-
-        # Step 1: Sanitize
-        try:
-            sanitized_question = InputValidator.sanitize_input(question)
-        except ValueError as e:
-            raise ValueError(f"Invalid input: {str(e)}")
+        (
+            sanitized_question,
+            provider,
+            is_medical,
+            relevance_score,
+            warnings
+        ) = _validate_and_prepare_cached(question, provider)
 
-        # Step 2: Check relevance
-        is_medical, relevance_score = InputValidator.is_medical_question(
-            sanitized_question
-        )
-
-        if not is_medical:
-            warnings.append(
-                "Your question doesn't appear to be about insurance policies. "
-                "I can only answer questions about UHC insurance coverage."
-            )
-
-        if relevance_score < 0.3:
-            warnings.append(
-                "Your question might be too general. "
-                "Try asking about specific procedures or coverage criteria."
-            )
-
-        # Step 3: Detect provider if not specified
-        if not provider:
-            detected_provider = InputValidator.extract_provider(sanitized_question)
-            provider = detected_provider or "UHC"  # Default to UHC
-        else:
-            provider = provider.upper()
-
-        # Step 4: Return prepared data
         return {
             'question': sanitized_question,
             'provider': provider,
             'is_relevant': is_medical,
             'relevance_score': relevance_score,
-            'warnings': warnings
+            'warnings': list(warnings)
         }
+
+
+@lru_cache(maxsize=2048)
+def _validate_and_prepare_cached(
+    question: str,
+    provider: Optional[str]
+) -> Tuple[str, str, bool, float, Tuple[str, ...]]:
+    """
+    Cached core of InputValidator.validate_and_prepare
+
+    Returns an immutable tuple so cached results cannot be mutated by callers.
+    Invalid input raises ValueError, which lru_cache does not memoize.
+    """
+    warnings = []
+
+    # Step 1: Sanitize
+    try:
+        sanitized_question = InputValidator.sanitize_input(question)
+    except ValueError as e:
+        raise ValueError(f"Invalid input: {str(e)}")
+
+    # Step 2: Check relevance
+    is_medical, relevance_score = InputValidator.is_medical_question(
+        sanitized_question
+    )
+
+    if not is_medical:
+        warnings.append(
+            "Your question doesn't appear to be about insurance policies. "
+            "I can only answer questions about UHC insurance coverage."
+        )
+
+    if relevance_score < 0.3:
+        warnings.append(
+            "Your question might be too general. "
+            "Try asking about specific procedures or coverage criteria."
+        )
+
+    # Step 3: Detect provider if not specified
+    if not provider:
+        detected_provider = InputValidator.extract_provider(sanitized_question)
+        provider = detected_provider or "UHC"  # Default to UHC
+    else:
+        provider = InputValidator.normalize_provider(provider)
+
+    # Step 4: Return prepared data
+    return (
+        sanitized_question,
+        provider,
+        is_medical,
+        relevance_score,
+        tuple(warnings)
+    )
@@ -0,0 +1,237 @@
+"""
+Shared policy chunking for the ChromaDB loaders
+
+Used by both load_all_providers.py and load_chromadb.py. Functions are
+module-level so ProcessPoolExecutor workers can pickle and run them.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice, repeat
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import ijson
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Rust splitter (releases the GIL, much faster); falls back to the LangChain splitter
+try:
+    from semantic_text_splitter import TextSplitter
+    RUST_SPLITTER_AVAILABLE = True
+except ImportError:
+    RUST_SPLITTER_AVAILABLE = False
+
+# Chunking parameters (characters)
+CHUNK_SIZE = 1000  # ~250 words per chunk
+CHUNK_OVERLAP = 200  # Overlap to preserve context
+MAX_CHUNK_SIZE = 1150  # Re-split merged chunks above this
+MIN_CHUNK_SIZE = 100  # Fold chunks below this into the previous one
+MIN_JOIN_OVERLAP = 10  # Shortest seam treated as splitter overlap when joining chunks
+
+# A section whose first N characters already appear in the content is not re-appended
+SECTION_PREFIX_CHECK = 200
+
+# Policies below this count are chunked in-process (pool startup isn't worth it)
+PARALLEL_CHUNKING_MIN_POLICIES = 20
+
+# Policies parsed per streaming batch (bounds memory while chunking/inserting)
+POLICY_STREAM_BATCH = 100
+
+# Text splitter, built lazily once per process (including pool workers)
+_text_splitter = None
+
+def make_splitter():
+    """Return this process's text splitter, creating it on first use"""
+    global _text_splitter
+    if _text_splitter is None:
+        if RUST_SPLITTER_AVAILABLE:
+            # Chunks between 900 and CHUNK_SIZE characters, split on semantic boundaries
+            _text_splitter = TextSplitter((CHUNK_SIZE - 100, CHUNK_SIZE), overlap=CHUNK_OVERLAP)
+        else:
+            _text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+                separators=["\n\n", "\n", ". ", " ", ""],
+                length_function=len
+            )
+    return _text_splitter
+
+def _split_text(text: str) -> List[str]:
+    """Split text with whichever splitter is available"""
+    splitter = make_splitter()
+    if RUST_SPLITTER_AVAILABLE:
+        return splitter.chunks(text)
+    return splitter.split_text(text)
+
+def _join_chunks(first: str, second: str) -> str:
+    """
+    Join two adjacent chunks, dropping the overlap the splitter repeated
+
+    Only a run of whole words (at least MIN_JOIN_OVERLAP characters) counts
+    as overlap, so chunks that merely share a letter at the seam are joined
+    as-is instead of losing text.
+    """
+    for size in range(min(len(first), len(second), CHUNK_OVERLAP), MIN_JOIN_OVERLAP - 1, -1):
+        if (first.endswith(second[:size])
+                and (size == len(first) or first[-size - 1].isspace())
+                and (size == len(second) or second[size].isspace())):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+def _regularize_chunks(text_chunks: List[str]) -> List[str]:
+    """
+    Split-then-merge post-pass over the splitter output
+
+    1. Greedily merge adjacent chunks while they fit in CHUNK_SIZE
+    2. Re-split anything longer than MAX_CHUNK_SIZE
+    3. Fold chunks shorter than MIN_CHUNK_SIZE into the previous one
+
+    Fewer, fuller chunks mean fewer embeddings and better retrieval context.
+    """
+    merged = []
+    for segment in text_chunks:
+        if merged and len(merged[-1]) + len(segment) + CHUNK_OVERLAP <= CHUNK_SIZE:
+            merged[-1] = _join_chunks(merged[-1], segment)
+        else:
+            merged.append(segment)
+
+    regular = []
+    for chunk in merged:
+        if len(chunk) > MAX_CHUNK_SIZE:
+            regular.extend(_split_text(chunk))
+        else:
+            regular.append(chunk)
+
+    result = []
+    for chunk in regular:
+        if (result and len(chunk) < MIN_CHUNK_SIZE
+                and len(result[-1]) + len(chunk) <= MAX_CHUNK_SIZE):
+            result[-1] = _join_chunks(result[-1], chunk)
+        else:
+            result.append(chunk)
+
+    return result
+
+def chunk_policy(policy: Dict, provider: str) -> List[Dict]:
+    """
+    Chunk a single policy into smaller segments
+
+    Module-level (not a method) so it can run in ProcessPoolExecutor workers.
+
+    Args:
+        policy: Policy dictionary
+        provider: Provider tag stored in each chunk's metadata
+
+    Returns:
+        List of chunk dictionaries with text and metadata
+    """
+    content = policy.get('content', '')
+
+    # Add section content (skipping sections the main content already contains,
+    # e.g. when the scraper captured them in both the content div and the sections)
+    sections = policy.get('sections', {})
+    if sections:
+        section_text = '\n\n'.join([
+            f"{key.upper()}\n{value}"
+            for key, value in sections.items()
+            if value and str(value)[:SECTION_PREFIX_CHECK] not in content
+        ])
+        if section_text:
+            content = f"{content}\n\n{section_text}"
+
+    # Split into chunks, then merge/re-split to regular sizes
+    text_chunks = _regularize_chunks(_split_text(content))
+
+    # Create chunk documents
+    chunks = []
+    for i, chunk_text in enumerate(text_chunks):
+        chunks.append({
+            'text': chunk_text,
+            'metadata': {
+                'policy_id': policy.get('policy_id', 'unknown'),
+                'title': policy.get('title', 'Unknown Policy'),
+                'source_url': policy.get('url', ''),
+                'provider': provider,  # ← KEY: Provider tag!
+                'chunk_index': i,
+                'chunk_id': f"{policy.get('policy_id', 'unknown')}_chunk_{i}",  # Readable id
+                'total_chunks': len(text_chunks),
+                'scraped_at': policy.get('scraped_at', '')
+            }
+        })
+
+    return chunks
+
+def chunk_document_id(chunk_id: str) -> str:
+    """
+    ChromaDB document id for a chunk: a fixed-length 16-hex-char hash
+
+    Short fixed-length primary keys keep SQLite index pages dense; the
+    readable "<policy_id>_chunk_<n>" id is kept in the chunk metadata.
+    """
+    return hashlib.blake2b(chunk_id.encode('utf-8'), digest_size=8).hexdigest()
+
+def _chunk_workers() -> int:
+    """Chunking worker count from CHUNK_WORKERS (default: number of CPUs)"""
+    return int(os.getenv("CHUNK_WORKERS", "0")) or os.cpu_count() or 1
+
+@contextmanager
+def chunking_pool() -> Iterator[Optional[ProcessPoolExecutor]]:
+    """
+    Process pool for chunk_policies, shared by every batch of a load
+
+    Workers start once and keep their text splitter across batches. Yields
+    None when only one worker is configured (chunking then runs in-process).
+    """
+    workers = _chunk_workers()
+    if workers <= 1:
+        yield None
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield executor
+
+def chunk_policies(policies: List[Dict], provider: str,
+                   executor: Optional[ProcessPoolExecutor] = None) -> List[List[Dict]]:
+    """
+    Chunk many policies, in parallel across CPU cores when there are enough
+
+    Args:
+        policies: Policies to chunk
+        provider: Provider tag stored in each chunk's metadata
+        executor: Pool from chunking_pool(); without one, chunks in-process
+
+    Returns:
+        One list of chunks per policy, in input order
+    """
+    if executor is None or len(policies) < PARALLEL_CHUNKING_MIN_POLICIES:
+        return [chunk_policy(policy, provider) for policy in policies]
+
+    return list(executor.map(
+        chunk_policy,
+        policies,
+        repeat(provider),
+        chunksize=max(1, len(policies) // (_chunk_workers() * 4))
+    ))
+
+def iter_policies(json_file: Path) -> Iterator[Dict]:
+    """
+    Stream policies out of a JSON array file without loading it whole
+
+    Args:
+        json_file: Path to a JSON file containing a list of policies
+
+    Yields:
+        Policy dictionaries, one at a time
+    """
+    with open(json_file, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+def iter_policy_batches(policies: Iterable[Dict], size: int = POLICY_STREAM_BATCH) -> Iterator[List[Dict]]:
+    """Group a policy stream into lists of at most `size` policies"""
+    policies = iter(policies)
+    while True:
+        batch = list(islice(policies, size))
+        if not batch:
+            return
+        yield batch
@@ -8,13 +8,31 @@ The system automatically filters by provider when querying, making it
 trivial to add new providers without changing any backend code.
 """
 
-import json
+import argparse
 import sys
 import os
+import atexit
+import hashlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, List, Optional, Set
 import chromadb
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import numpy as np
+import orjson
+from chromadb.utils import embedding_functions
+
+# Batched (GPU when available) embeddings; falls back to Chroma's ONNX model on CPU
+try:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+# Shared chunking module lives next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from _chunking import chunk_document_id, chunk_policies, chunking_pool, iter_policies, iter_policy_batches
 
 class MultiProviderLoader:
     """Load policies from multiple providers into ChromaDB"""
@@ -38,6 +56,25 @@ class MultiProviderLoader:
         }
     ]
 
+    # Provider index sidecar (read by the API's /api/providers endpoint)
+    PROVIDER_INDEX_FILE = "providers.json"
+
+    # SQLite settings used when BULK_LOAD_UNSAFE=1 (see _apply_bulk_load_pragmas)
+    BULK_LOAD_PRAGMAS = (
+        "journal_mode=off",
+        "synchronous=off",
+        "temp_store=memory",
+        # No locking_mode=exclusive: demo queries run on other threads' connections
+        "cache_size=-262144",  # 256 MB page cache
+    )
+
+    # RAM-backed staging directory used when CHROMA_BULK_TMPFS=1
+    BULK_TMPFS_DIRECTORY = "/dev/shm/chroma_bulk"
+
+    # Ingestion embedding model (must match the API's query embeddings)
+    EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE = 256
+
     def __init__(self):
         """Initialize multi-provider loader"""
         # Use CHROMA_PERSIST_DIRECTORY from env, or default to relative path
@@ -48,19 +85,47 @@ class MultiProviderLoader:
         )
         self.collection_name = os.getenv("CHROMA_COLLECTION_NAME", "insurance_policies")
 
-        # Text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ". ", " ", ""],
-            length_function=len
-        )
+        # Bulk-load into RAM (no fsync stalls), copy back to disk once on exit
+        if os.getenv("CHROMA_BULK_TMPFS") == "1":
+            self._use_tmpfs()
+
+        # Chunks per collection.add() call (one SQLite transaction each)
+        self.batch_size = int(os.getenv("CHROMA_BATCH_SIZE", "200"))
+
+        # Embeddings are computed here once per chunk and shared by both collections
+        self.embedding_model = self._load_embedding_model()
+
+        # Optional embedding quantization: "fp16", "int8", or unset for full fp32
+        self.embedding_quantization = os.getenv("EMBEDDING_QUANTIZATION", "").lower()
+        if self.embedding_quantization not in ("", "fp16", "int8"):
+            print(f"⚠️  Unknown EMBEDDING_QUANTIZATION '{self.embedding_quantization}', using fp32")
+            self.embedding_quantization = ""
 
         # Initialize ChromaDB
         self.client = None
         self.collection = None
         self._initialize_db()
 
+    def _use_tmpfs(self):
+        """
+        Redirect ChromaDB writes to a RAM-backed directory for the bulk load
+
+        Existing data is seeded into tmpfs first so incremental loads still
+        see it; the whole directory is copied back to the original path when
+        the process exits. Leftovers from an earlier run are removed first,
+        so a wiped data directory is rebuilt rather than restored from tmpfs.
+        """
+        original_directory = self.persist_directory
+        shutil.rmtree(self.BULK_TMPFS_DIRECTORY, ignore_errors=True)
+        if os.path.isdir(original_directory):
+            shutil.copytree(original_directory, self.BULK_TMPFS_DIRECTORY, dirs_exist_ok=True)
+
+        self.persist_directory = self.BULK_TMPFS_DIRECTORY
+        atexit.register(
+            shutil.copytree, self.BULK_TMPFS_DIRECTORY, original_directory, dirs_exist_ok=True
+        )
+        print(f"  ⚡ Bulk loading in tmpfs: {self.BULK_TMPFS_DIRECTORY} (copied to {original_directory} on exit)")
+
     def _initialize_db(self):
         """Initialize ChromaDB client"""
         print(f"Initializing ChromaDB at: {self.persist_directory}")
@@ -70,6 +135,10 @@ class MultiProviderLoader:
         self.client = chromadb.PersistentClient(path=self.persist_directory)
         print(f"ChromaDB client created successfully")
 
+        # Bulk-load mode: trade crash safety for ingest speed (loader only, re-runnable)
+        if os.getenv("BULK_LOAD_UNSAFE") == "1":
+            self._apply_bulk_load_pragmas()
+
         # Try to get existing collection, create if doesn't exist
         try:
             self.collection = self.client.get_collection(name=self.collection_name)
@@ -90,8 +159,30 @@ class MultiProviderLoader:
             print(f"  Created new collection: {self.collection_name}\n")
             self._skip_loading = False
 
-    def load_all_providers(self):
-        """Load policies from all providers"""
+    def _apply_bulk_load_pragmas(self):
+        """
+        Relax SQLite durability on Chroma's backing database for bulk ingest
+
+        Disables the journal and fsyncs, so each add() no longer pays for a
+        durable transaction. A crash mid-load can
+        corrupt the database; the load is idempotent, so just re-run it.
+        """
+        try:
+            conn = self.client._server._sysdb._conn_pool.connect()
+            for pragma in self.BULK_LOAD_PRAGMAS:
+                conn.execute(f"PRAGMA {pragma}")
+            print(f"  ⚡ Bulk-load SQLite pragmas applied: {', '.join(self.BULK_LOAD_PRAGMAS)}")
+        except Exception as e:
+            # Private Chroma internals; never fail the load over an optimization
+            print(f"  ⚠️  Could not apply bulk-load pragmas: {e}")
+
+    def load_all_providers(self, demo: bool = False):
+        """
+        Load policies from all providers
+
+        Args:
+            demo: Run the provider filtering demo queries after loading
+        """
         # Skip if collection already has data
         if self._skip_loading:
             return
@@ -107,14 +198,22 @@ class MultiProviderLoader:
 
         total_policies = 0
         total_chunks = 0
+        loaded_providers = []
 
-        for provider_info in self.PROVIDERS:
-            policies_loaded, chunks_loaded = self.load_provider(provider_info)
-            total_policies += policies_loaded
-            total_chunks += chunks_loaded
+        # One chunking pool for the whole load (workers are not re-spawned per batch)
+        with chunking_pool() as pool:
+            for provider_info in self.PROVIDERS:
+                policies_loaded, chunks_loaded = self.load_provider(provider_info, pool)
+                total_policies += policies_loaded
+                total_chunks += chunks_loaded
+                if chunks_loaded:
+                    loaded_providers.append(provider_info['name'])
 
         # Data is automatically persisted with PersistentClient
 
+        # Write provider index so the API can list providers without a scan
+        self.write_provider_index(loaded_providers)
+
         print("\n" + "="*80)
         print("LOADING COMPLETE")
         print("="*80)
@@ -124,11 +223,18 @@ class MultiProviderLoader:
         print(f"ChromaDB Location: {self.persist_directory}")
         print("="*80 + "\n")
 
-        # Demonstrate querying by provider
-        self.demonstrate_provider_filtering()
+        # Demonstrate querying by provider (opt-in: --demo)
+        if demo:
+            self.demonstrate_provider_filtering()
+
+    def load_provider(self, provider_info: Dict, chunk_pool: Optional[ProcessPoolExecutor] = None) -> tuple:
+        """
+        Load policies for a single provider
 
-    def load_provider(self, provider_info: Dict) -> tuple:
-        """Load policies for a single provider"""
+        Args:
+            provider_info: Entry from PROVIDERS
+            chunk_pool: Shared pool from chunking_pool(); without one, chunks in-process
+        """
         provider_name = provider_info['name']
         provider_file = provider_info['file']
         display_name = provider_info['display_name']
@@ -144,75 +250,168 @@ class MultiProviderLoader:
             print(f"  ⚠️  File not found: {provider_file} - Skipping")
             return 0, 0
 
-        with open(json_file, 'r', encoding='utf-8') as f:
-            policies = json.load(f)
-
-        print(f"  Found {len(policies)} policies")
-
-        # Chunk policies
-        all_chunks = []
-        for policy in policies:
-            chunks = self.chunk_policy(policy, provider_name)
-            all_chunks.extend(chunks)
-            print(f"  {policy['policy_id']}: {len(chunks)} chunks")
-
-        # Load into ChromaDB
-        if all_chunks:
-            self.load_chunks(all_chunks)
-            print(f"  ✅ Loaded {len(all_chunks)} chunks for {provider_name}\n")
-
-        return len(policies), len(all_chunks)
-
-    def chunk_policy(self, policy: Dict, provider: str) -> List[Dict]:
-        """Chunk a single policy"""
-        content = policy.get('content', '')
-
-        # Add section content
-        sections = policy.get('sections', {})
-        if sections:
-            section_text = '\n\n'.join([
-                f"{key.upper()}\n{value}"
-                for key, value in sections.items()
-                if value
-            ])
-            content = f"{content}\n\n{section_text}"
-
-        # Split into chunks
-        text_chunks = self.text_splitter.split_text(content)
-
-        # Create chunk documents
-        chunks = []
-        for i, chunk_text in enumerate(text_chunks):
-            chunks.append({
-                'text': chunk_text,
-                'metadata': {
-                    'policy_id': policy.get('policy_id', 'unknown'),
-                    'title': policy.get('title', 'Unknown Policy'),
-                    'source_url': policy.get('url', ''),
-                    'provider': provider,  # ← KEY: Provider tag!
-                    'chunk_index': i,
-                    'total_chunks': len(text_chunks),
-                    'scraped_at': policy.get('scraped_at', '')
-                }
-            })
-
-        return chunks
-
-    def load_chunks(self, chunks: List[Dict]):
-        """Load chunks into ChromaDB"""
-        documents = [chunk['text'] for chunk in chunks]
-        metadatas = [chunk['metadata'] for chunk in chunks]
-        ids = [
-            f"{chunk['metadata']['policy_id']}_chunk_{chunk['metadata']['chunk_index']}"
-            for chunk in chunks
-        ]
-
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+        # Stream policies in batches: parse -> chunk (parallel) -> insert
+        provider_collection = self.get_provider_collection(provider_name)
+        seen_chunks = set()  # Content hashes of chunks already loaded for this provider
+        policy_count = 0
+        chunk_count = 0
+        duplicate_count = 0
+        for policies in iter_policy_batches(iter_policies(json_file)):
+            batch_chunks = []
+            for policy, chunks in zip(policies, chunk_policies(policies, provider_name, chunk_pool)):
+                unique_chunks = self._drop_duplicate_chunks(chunks, seen_chunks)
+                batch_chunks.extend(unique_chunks)
+                duplicate_count += len(chunks) - len(unique_chunks)
+                print(f"  {policy['policy_id']}: {len(chunks)} chunks")
+
+            if batch_chunks:
+                self.load_chunks(batch_chunks, provider_collection)
+
+            policy_count += len(policies)
+            chunk_count += len(batch_chunks)
+
+        print(f"  Found {policy_count} policies")
+        if duplicate_count:
+            print(f"  Skipped {duplicate_count} duplicate chunks (boilerplate shared across policies)")
+        if chunk_count:
+            print(f"  ✅ Loaded {chunk_count} chunks for {provider_name}\n")
+
+        return policy_count, chunk_count
+
+    def _drop_duplicate_chunks(self, chunks: List[Dict], seen: Set[bytes]) -> List[Dict]:
+        """
+        Filter out chunks whose text was already loaded
+
+        The first occurrence keeps its policy_id/chunk_index provenance;
+        later identical chunks are not embedded or inserted again.
+        """
+        unique = []
+        for chunk in chunks:
+            digest = hashlib.blake2b(chunk['text'].encode('utf-8'), digest_size=16).digest()
+            if digest not in seen:
+                seen.add(digest)
+                unique.append(chunk)
+        return unique
+
+    def get_provider_collection(self, provider: str):
+        """
+        Get or create the per-provider collection
+
+        The API queries this collection directly, so provider-scoped searches
+        don't need a metadata `where` filter on the shared collection.
+        """
+        return self.client.get_or_create_collection(
+            name=f"{self.collection_name}__{provider}",
+            metadata={"hnsw:space": "cosine"}
         )
 
+    def _load_embedding_model(self):
+        """
+        Load the embedding model used for ingestion
+
+        Same model the API embeds questions with (all-MiniLM-L6-v2), so
+        stored and query vectors stay compatible.
+        """
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            print(f"Embedding model: SentenceTransformer {self.EMBEDDING_MODEL} ({device})")
+            return SentenceTransformer(self.EMBEDDING_MODEL, device=device)
+
+        print("Embedding model: ChromaDB default (ONNX, CPU)")
+        return embedding_functions.DefaultEmbeddingFunction()
+
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """Embed documents in large batches (quantized if configured)"""
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            embeddings = self.embedding_model.encode(
+                documents,
+                batch_size=self.EMBEDDING_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        else:
+            embeddings = np.asarray(self.embedding_model(documents), dtype=np.float32)
+
+        return self._quantize_embeddings(embeddings).tolist()
+
+    def _quantize_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Round embeddings to fp16 or per-vector scaled int8 precision
+
+        Chroma only accepts float vectors, so the result is dequantized back
+        to float32; the stored values carry fp16/int8 information content.
+        """
+        if self.embedding_quantization == "fp16":
+            return embeddings.astype(np.float16).astype(np.float32)
+
+        if self.embedding_quantization == "int8":
+            scale = np.abs(embeddings).max(axis=1, keepdims=True) / 127
+            scale[scale == 0] = 1.0  # All-zero vectors stay zero
+            quantized = np.clip(np.round(embeddings / scale), -127, 127).astype(np.int8)
+            return quantized.astype(np.float32) * scale
+
+        return embeddings
+
+    def load_chunks(self, chunks: List[Dict], provider_collection=None):
+        """Load chunks into ChromaDB (shared collection + provider collection)"""
+        # Single pass over chunks into pre-sized lists
+        count = len(chunks)
+        documents = [None] * count
+        metadatas = [None] * count
+        ids = [None] * count
+        for i, chunk in enumerate(chunks):
+            metadata = chunk['metadata']
+            documents[i] = chunk['text']
+            metadatas[i] = metadata
+            ids[i] = chunk_document_id(metadata['chunk_id'])
+
+        # Embed once up front so Chroma doesn't re-embed for each collection
+        embeddings = self.embed_documents(documents)
+
+        self._add_in_batches(self.collection, documents, metadatas, ids, embeddings)
+
+        if provider_collection is not None:
+            self._add_in_batches(provider_collection, documents, metadatas, ids, embeddings)
+
+    def _add_in_batches(self, collection, documents: List[str], metadatas: List[Dict], ids: List[str],
+                        embeddings: List[List[float]]):
+        """Add documents in fixed-size batches to amortize per-call write overhead"""
+        for start in range(0, len(ids), self.batch_size):
+            end = start + self.batch_size
+            collection.add(
+                embeddings=embeddings[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
+
+    def write_provider_index(self, providers: List[str]):
+        """
+        Write the provider index sidecar next to the ChromaDB data
+
+        The API reads this file for /api/providers instead of walking every
+        document's metadata. Existing entries are kept so loaders can run
+        incrementally.
+        """
+        index_file = Path(self.persist_directory) / self.PROVIDER_INDEX_FILE
+
+        existing = []
+        if index_file.exists():
+            try:
+                with open(index_file, 'rb') as f:
+                    existing = orjson.loads(f.read())
+            except (OSError, ValueError):
+                existing = []
+
+        merged = sorted(set(existing) | set(providers))
+
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(index_file, 'wb') as f:
+            f.write(orjson.dumps(merged))
+
+        print(f"Provider index written: {index_file} ({merged})")
+
     def demonstrate_provider_filtering(self):
         """Demonstrate how provider filtering works"""
         print("\n" + "="*80)
@@ -222,19 +421,26 @@ class MultiProviderLoader:
 
         question = "What are the BMI requirements for bariatric surgery?"
 
-        for provider_info in self.PROVIDERS:
+        # Embed the question once, then run the per-provider searches concurrently
+        query_embedding = self.embed_documents([question])[0]
+
+        def query_provider(provider_info: Dict) -> Dict:
+            return self.collection.query(
+                query_embeddings=[query_embedding],
+                n_results=2,
+                where={"provider": provider_info['name']}  # ← FILTERING BY PROVIDER!
+            )
+
+        with ThreadPoolExecutor(max_workers=len(self.PROVIDERS)) as executor:
+            all_results = list(executor.map(query_provider, self.PROVIDERS))
+
+        for provider_info, results in zip(self.PROVIDERS, all_results):
             provider = provider_info['name']
             display_name = provider_info['display_name']
 
             print(f"\n🔍 Query for {display_name} ({provider}):")
             print("-" * 80)
 
-            results = self.collection.query(
-                query_texts=[question],
-                n_results=2,
-                where={"provider": provider}  # ← FILTERING BY PROVIDER!
-            )
-
             if results['documents'] and len(results['documents'][0]) > 0:
                 for i, (doc, meta) in enumerate(zip(results['documents'][0], results['metadatas'][0])):
                     print(f"\nResult {i+1}:")
@@ -251,8 +457,16 @@ class MultiProviderLoader:
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Load all provider policies into ChromaDB")
+    parser.add_argument(
+        "--demo",
+        action="store_true",
+        help="Run provider filtering demo queries after loading"
+    )
+    args = parser.parse_args()
+
     loader = MultiProviderLoader()
-    loader.load_all_providers()
+    loader.load_all_providers(demo=args.demo)
 
     print("\n" + "🎯 " + "="*76)
     print("SCALABILITY DEMONSTRATED:")
@@ -8,21 +8,28 @@ This script:
 4. Stores in ChromaDB for semantic search
 """
 
-import json
+import os
 import sys
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List
 import chromadb
 from chromadb.config import Settings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from chromadb.utils import embedding_functions
 
 # Add parent directory to path for config imports
 sys.path.append(str(Path(__file__).parent.parent))
 from app.config import settings
 
+# Shared chunking module lives next to this script
+sys.path.insert(0, str(Path(__file__).parent))
+from _chunking import chunk_document_id, chunk_policies, chunking_pool, iter_policies, iter_policy_batches
+
 class ChromaDBLoader:
     """Load policy data into ChromaDB"""
 
+    # Provider tag stored on every chunk
+    PROVIDER = 'UHC'
+
     def __init__(
         self,
         persist_directory: str = None,
@@ -38,30 +45,27 @@ class ChromaDBLoader:
         self.persist_directory = persist_directory or settings.CHROMA_PERSIST_DIRECTORY
         self.collection_name = collection_name or settings.CHROMA_COLLECTION_NAME
 
-        # Text splitter for chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,  # ~250 words per chunk
-            chunk_overlap=200,  # Overlap to preserve context
-            separators=["\n\n", "\n", ". ", " ", ""],
-            length_function=len
-        )
+        # Chunks per collection.add() call (one SQLite transaction each)
+        self.batch_size = int(os.getenv("CHROMA_BATCH_SIZE", "200"))
+
+        # Same default model ChromaDB embeds with; chunks are embedded once
+        # and the vectors shared by both collections
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
 
         # Initialize ChromaDB
         self.client = None
         self.collection = None
+        self.provider_collection = None
         self._initialize_db()
 
     def _initialize_db(self):
         """Initialize ChromaDB client and collection"""
         print(f"Initializing ChromaDB at: {self.persist_directory}")
 
-        # Create persistent client
-        self.client = chromadb.Client(
-            Settings(
-                chroma_db_impl="duckdb+parquet",
-                persist_directory=self.persist_directory,
-                anonymized_telemetry=False
-            )
+        # Create persistent client (SQLite + HNSW; writes are persisted as they happen)
+        self.client = chromadb.PersistentClient(
+            path=self.persist_directory,
+            settings=Settings(anonymized_telemetry=False)
         )
 
         # Get or create collection
@@ -76,114 +80,95 @@ class ChromaDBLoader:
             )
             print(f"  Created new collection: {self.collection_name}")
 
-    def load_policies_from_json(self, json_file: Path) -> List[Dict]:
-        """Load policies from JSON file"""
-        print(f"\nLoading policies from: {json_file}")
-
-        with open(json_file, 'r', encoding='utf-8') as f:
-            policies = json.load(f)
-
-        print(f"  Loaded {len(policies)} policies")
-        return policies
+        # Per-provider collection, queried directly by the API (kept in sync
+        # with the shared collection, as load_all_providers.py does)
+        self.provider_collection = self.client.get_or_create_collection(
+            name=f"{self.collection_name}__{self.PROVIDER}",
+            metadata={"hnsw:space": "cosine"}
+        )
 
-    def chunk_policy(self, policy: Dict) -> List[Dict]:
-        """
-        Chunk a single policy into smaller segments
+    def load_policies_from_json(self, json_file: Path) -> Iterator[Dict]:
+        """Stream policies from JSON file (parsed lazily as they are consumed)"""
+        print(f"\nLoading policies from: {json_file}")
 
-        Args:
-            policy: Policy dictionary
+        return iter_policies(json_file)
 
-        Returns:
-            List of chunk dictionaries with text and metadata
-        """
-        # Extract policy content
-        content = policy.get('content', '')
-
-        # Also include section content if available
-        sections = policy.get('sections', {})
-        if sections:
-            section_text = '\n\n'.join([
-                f"{key.upper()}\n{value}"
-                for key, value in sections.items()
-                if value
-            ])
-            content = f"{content}\n\n{section_text}"
-
-        # Split into chunks
-        text_chunks = self.text_splitter.split_text(content)
-
-        # Create chunk documents with metadata
-        chunks = []
-        for i, chunk_text in enumerate(text_chunks):
-            chunks.append({
-                'text': chunk_text,
-                'metadata': {
-                    'policy_id': policy.get('policy_id', 'unknown'),
-                    'title': policy.get('title', 'Unknown Policy'),
-                    'source_url': policy.get('url', ''),
-                    'provider': 'UHC',  # For extensibility
-                    'chunk_index': i,
-                    'total_chunks': len(text_chunks),
-                    'scraped_at': policy.get('scraped_at', '')
-                }
-            })
-
-        return chunks
-
-    def chunk_all_policies(self, policies: List[Dict]) -> List[Dict]:
-        """Chunk all policies"""
+    def chunk_all_policies(self, policies: Iterable[Dict]) -> List[Dict]:
+        """Chunk all policies (accepts a list or a streamed iterator)"""
         print("\nChunking policies...")
 
         all_chunks = []
+        policy_count = 0
 
-        for policy in policies:
-            chunks = self.chunk_policy(policy)
-            all_chunks.extend(chunks)
+        # Streamed batches, each chunked in parallel across cores when large enough
+        with chunking_pool() as pool:
+            for batch in iter_policy_batches(policies):
+                for policy, chunks in zip(batch, chunk_policies(batch, self.PROVIDER, pool)):
+                    all_chunks.extend(chunks)
 
-            print(f"  {policy.get('policy_id')}: {len(chunks)} chunks")
+                    print(f"  {policy.get('policy_id')}: {len(chunks)} chunks")
+                policy_count += len(batch)
 
-        print(f"\n  Total chunks: {len(all_chunks)}")
+        print(f"\n  Loaded {policy_count} policies")
+        print(f"  Total chunks: {len(all_chunks)}")
         return all_chunks
 
-    def load_chunks_to_chromadb(self, chunks: List[Dict], batch_size: int = 100):
+    def load_chunks_to_chromadb(self, chunks: List[Dict], batch_size: int = None):
         """
         Load chunks into ChromaDB
 
         Args:
             chunks: List of chunk dictionaries
-            batch_size: Number of chunks to add per batch
+            batch_size: Number of chunks to add per batch (default: CHROMA_BATCH_SIZE)
         """
         print(f"\nLoading {len(chunks)} chunks into ChromaDB...")
 
-        # Process in batches
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-
-            # Prepare batch data
-            documents = [chunk['text'] for chunk in batch]
-            metadatas = [chunk['metadata'] for chunk in batch]
-            ids = [
-                f"{chunk['metadata']['policy_id']}_chunk_{chunk['metadata']['chunk_index']}"
-                for chunk in batch
-            ]
-
-            # Add to collection
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
-
-            print(f"  Loaded batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
+        # Prepare data
+        # Single pass over chunks into pre-sized lists
+        count = len(chunks)
+        documents = [None] * count
+        metadatas = [None] * count
+        ids = [None] * count
+        for i, chunk in enumerate(chunks):
+            metadata = chunk['metadata']
+            documents[i] = chunk['text']
+            metadatas[i] = metadata
+            ids[i] = chunk_document_id(metadata['chunk_id'])
+
+        # Add to collection in batches
+        self._add_in_batches(documents, metadatas, ids, batch_size or self.batch_size)
 
         print(f"\n✅ Successfully loaded {len(chunks)} chunks")
         print(f"   Total documents in collection: {self.collection.count()}")
 
+    def _add_in_batches(self, documents: List[str], metadatas: List[Dict], ids: List[str], batch_size: int):
+        """
+        Add documents in fixed-size batches to amortize per-call write overhead
+
+        Each batch goes to the shared collection and the provider collection.
+        """
+        total_batches = (len(ids) - 1) // batch_size + 1
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            embeddings = self.embedding_function(documents[start:end])
+            for collection in (self.collection, self.provider_collection):
+                collection.add(
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    embeddings=embeddings,
+                    ids=ids[start:end]
+                )
+
+            print(f"  Loaded batch {start//batch_size + 1}/{total_batches}")
+
     def persist(self):
-        """Persist ChromaDB to disk"""
-        print("\nPersisting ChromaDB to disk...")
-        self.client.persist()
-        print("  ✅ Database persisted")
+        """
+        Persist ChromaDB to disk
+
+        Kept for backwards compatibility: PersistentClient writes through to
+        disk on every add(), so there is nothing left to flush.
+        """
+        print("\n  ✅ Database persisted (PersistentClient writes through)")
 
     def test_query(self, query: str, n_results: int = 3):
         """Test a sample query"""
@@ -7,30 +7,88 @@ for ingestion into ChromaDB vector database.
 Data Source: https://www.uhcprovider.com/en/policies-protocols/commercial-policies/commercial-medical-drug-policies.html
 """
 
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+import asyncio
 import time
-import json
+import requests
+import httpx
+from typing import List, Dict, Optional, Tuple
+import orjson
 from pathlib import Path
 import re
 from datetime import datetime
 
+# Fast C HTML parser (Modest engine); fall back to BeautifulSoup + lxml if unavailable
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    from bs4 import BeautifulSoup
+    SELECTOLAX_AVAILABLE = False
+    print("⚠️  selectolax not available, falling back to BeautifulSoup + lxml")
+
+class _RequestRateLimiter:
+    """
+    Space request starts at least `interval` seconds apart
+
+    Only sleeps for whatever is left of the interval, so slow responses
+    don't pay an extra fixed delay on top of their own latency.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_allowed = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            self._next_allowed = max(self._next_allowed, now)
+            wait = self._next_allowed - now
+            self._next_allowed += self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
 class UHCScraper:
     """Scraper for UHC commercial medical drug policies"""
 
     BASE_URL = "https://www.uhcprovider.com"
     POLICIES_URL = f"{BASE_URL}/en/policies-protocols/commercial-policies/commercial-medical-drug-policies.html"
 
-    def __init__(self, output_dir: str = "data/raw"):
+    # Politeness: at most MAX_CONCURRENT_REQUESTS in flight, and on average
+    # one request every REQUEST_DELAY / MAX_CONCURRENT_REQUESTS seconds
+    MAX_CONCURRENT_REQUESTS = 8
+    REQUEST_DELAY = 2.0
+
+    # Common section headers in insurance policies
+    SECTION_HEADERS = (
+        'coverage criteria',
+        'coverage determination',
+        'limitations',
+        'exclusions',
+        'definitions',
+        'background',
+        'benefit considerations',
+        'coding information',
+        'cpt codes',
+        'icd codes',
+        'references'
+    )
+
+    # One alternation for all headers, so a page needs a single header scan
+    _SECTION_RE = re.compile('|'.join(re.escape(h) for h in SECTION_HEADERS), re.IGNORECASE)
+
+    def __init__(self, output_dir: str = "data/raw", save_individual: bool = False):
         """
         Initialize scraper
 
         Args:
             output_dir: Directory to save scraped data
+            save_individual: Also write one JSON file per policy (the combined
+                file from save_all_policies() is what the loaders read)
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.save_individual = save_individual
 
         self.session = requests.Session()
         self.session.headers.update({
@@ -53,17 +111,12 @@ class UHCScraper:
             print(f"Error fetching policies page: {e}")
             return []
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-
         # Find all policy links
         # Note: This is a simplified version - actual scraping logic depends on UHC's HTML structure
         policy_links = []
 
         # Look for policy links in the page
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '')
-            text = link.get_text(strip=True)
-
+        for href, text in self._find_links(response.content):
             # Filter for policy links
             if 'medical-drug-policy' in href.lower() or 'coverage-determination' in href.lower():
                 full_url = href if href.startswith('http') else f"{self.BASE_URL}{href}"
@@ -77,6 +130,20 @@ class UHCScraper:
         print(f"Found {len(policy_links)} policy links")
         return policy_links
 
+    def _find_links(self, html: bytes) -> List[Tuple[str, str]]:
+        """Return (href, text) for every anchor with an href"""
+        if SELECTOLAX_AVAILABLE:
+            return [
+                (link.attributes.get('href') or '', link.text(strip=True))
+                for link in HTMLParser(html).css('a[href]')
+            ]
+
+        soup = BeautifulSoup(html, 'lxml')
+        return [
+            (link.get('href', ''), link.get_text(strip=True))
+            for link in soup.find_all('a', href=True)
+        ]
+
     def _extract_policy_id(self, href: str) -> str:
         """Extract policy ID from URL"""
         # Try to extract ID from URL pattern
@@ -106,24 +173,52 @@ class UHCScraper:
             print(f"Error scraping {policy_url}: {e}")
             return None
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        return self._parse_policy(policy_url, response.content)
 
-        # Extract content
-        # Note: Adjust selectors based on actual UHC page structure
-        title = soup.find('h1')
-        title_text = title.get_text(strip=True) if title else "Unknown Policy"
+    def _parse_policy(self, policy_url: str, html: bytes) -> Dict:
+        """
+        Parse a fetched policy page
 
-        # Get main content
-        content_div = soup.find('div', class_='content') or soup.find('article') or soup.find('main')
+        Args:
+            policy_url: URL of the policy page
+            html: Raw page content
 
-        if not content_div:
-            # Fallback: get all paragraphs
-            content_text = '\n\n'.join([p.get_text(strip=True) for p in soup.find_all('p')])
+        Returns:
+            Dictionary with policy content and metadata
+        """
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(html)
+
+            # Extract content
+            # Note: Adjust selectors based on actual UHC page structure
+            title = tree.css_first('h1')
+            title_text = title.text(strip=True) if title else "Unknown Policy"
+
+            # Get main content
+            content_div = tree.css_first('div.content') or tree.css_first('article') or tree.css_first('main')
+
+            if not content_div:
+                # Fallback: get all paragraphs
+                content_text = '\n\n'.join([p.text(strip=True) for p in tree.css('p')])
+            else:
+                content_text = '\n'.join(
+                    line for line in content_div.text(separator='\n', strip=True).split('\n') if line
+                )
         else:
-            content_text = content_div.get_text(separator='\n', strip=True)
+            tree = BeautifulSoup(html, 'lxml')
+
+            title = tree.find('h1')
+            title_text = title.get_text(strip=True) if title else "Unknown Policy"
+
+            content_div = tree.find('div', class_='content') or tree.find('article') or tree.find('main')
+
+            if not content_div:
+                content_text = '\n\n'.join([p.get_text(strip=True) for p in tree.find_all('p')])
+            else:
+                content_text = content_div.get_text(separator='\n', strip=True)
 
         # Extract sections
-        sections = self._extract_sections(soup)
+        sections = self._extract_sections(tree)
 
         return {
             'title': title_text,
@@ -133,41 +228,58 @@ class UHCScraper:
             'scraped_at': datetime.now().isoformat()
         }
 
-    def _extract_sections(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extract specific sections from policy page"""
+    def _extract_sections(self, tree) -> Dict[str, str]:
+        """
+        Extract specific sections from a parsed policy page
+
+        Walks the candidate header elements once; the first element matching
+        each known header starts that section.
+        """
         sections = {}
 
-        # Common section headers in insurance policies
-        section_headers = [
-            'coverage criteria',
-            'coverage determination',
-            'limitations',
-            'exclusions',
-            'definitions',
-            'background',
-            'benefit considerations',
-            'coding information',
-            'cpt codes',
-            'icd codes',
-            'references'
-        ]
+        if SELECTOLAX_AVAILABLE:
+            # Find headers (h2, h3, h4, or strong tag), in document order
+            for header_elem in tree.css('h2, h3, h4, strong'):
+                headers = self._match_section_headers(header_elem.text(strip=True), sections)
+                if not headers:
+                    continue
 
-        for header in section_headers:
-            # Find header (h2, h3, or strong tag)
-            header_elem = soup.find(['h2', 'h3', 'h4', 'strong'],
-                                   string=re.compile(header, re.IGNORECASE))
+                # Get content after header (element siblings only)
+                content = []
+                sibling = header_elem.next
+                while sibling is not None:
+                    if sibling.tag in ('h2', 'h3', 'h4'):
+                        break  # Stop at next header
+                    if sibling.tag[:1].isalpha():  # Skip text/comment nodes (-text, _comment)
+                        content.append(sibling.text(strip=True))
+                    sibling = sibling.next
+
+                for header in headers:
+                    sections[header] = '\n'.join(content)
+        else:
+            for header_elem in tree.find_all(['h2', 'h3', 'h4', 'strong'], string=self._SECTION_RE):
+                headers = self._match_section_headers(header_elem.get_text(strip=True), sections)
+                if not headers:
+                    continue
 
-            if header_elem:
-                # Get content after header
                 content = []
                 for sibling in header_elem.find_next_siblings():
                     if sibling.name in ['h2', 'h3', 'h4']:
                         break  # Stop at next header
                     content.append(sibling.get_text(strip=True))
 
-                sections[header] = '\n'.join(content)
+                for header in headers:
+                    sections[header] = '\n'.join(content)
 
-        return sections
+        # Keep the canonical header order (chunk text is built from it)
+        return {header: sections[header] for header in self.SECTION_HEADERS if header in sections}
+
+    def _match_section_headers(self, text: str, found: Dict[str, str]) -> List[str]:
+        """Known headers named in `text` that haven't been found yet"""
+        return [
+            header for header in dict.fromkeys(m.group(0).lower() for m in self._SECTION_RE.finditer(text))
+            if header not in found
+        ]
 
     def scrape_all_policies(self, limit: Optional[int] = None) -> List[Dict]:
         """
@@ -185,23 +297,62 @@ class UHCScraper:
             policy_links = policy_links[:limit]
             print(f"Limiting to {limit} policies for testing")
 
-        policies = []
+        return asyncio.run(self._scrape_policies_async(policy_links))
+
+    async def _scrape_policies_async(self, policy_links: List[Dict[str, str]]) -> List[Dict]:
+        """
+        Fetch policy pages concurrently, then parse them off the event loop
 
-        for i, link in enumerate(policy_links, 1):
-            print(f"[{i}/{len(policy_links)}] Scraping: {link['title']}")
+        Args:
+            policy_links: Policy link dictionaries from get_policy_links()
 
-            policy_data = self.scrape_policy(link['url'])
+        Returns:
+            List of policy dictionaries, in link order
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        rate_limiter = _RequestRateLimiter(self.REQUEST_DELAY / self.MAX_CONCURRENT_REQUESTS)
+        total = len(policy_links)
+
+        async with httpx.AsyncClient(
+            headers=dict(self.session.headers),
+            timeout=30,
+            follow_redirects=True
+        ) as client:
+
+            async def fetch(i: int, link: Dict[str, str]) -> Optional[bytes]:
+                async with semaphore:
+                    # Be respectful - rate limit request starts across all slots
+                    await rate_limiter.wait()
+                    print(f"[{i}/{total}] Scraping: {link['title']}")
+                    try:
+                        response = await client.get(link['url'])
+                        response.raise_for_status()
+                        return response.content
+                    except httpx.HTTPError as e:
+                        print(f"Error scraping {link['url']}: {e}")
+                        return None
+
+            pages = await asyncio.gather(*(
+                fetch(i, link) for i, link in enumerate(policy_links, 1)
+            ))
+
+        fetched = [(link, html) for link, html in zip(policy_links, pages) if html is not None]
+
+        # HTML parsing is CPU-bound; run it in worker threads
+        parsed = await asyncio.gather(*(
+            asyncio.to_thread(self._parse_policy, link['url'], html)
+            for link, html in fetched
+        ))
 
-            if policy_data:
-                policy_data['policy_id'] = link['policy_id']
-                policies.append(policy_data)
+        policies = []
+        for (link, _), policy_data in zip(fetched, parsed):
+            policy_data['policy_id'] = link['policy_id']
+            policies.append(policy_data)
 
-                # Save individual policy
+            # Save individual policy (optional; avoids one small file write per policy)
+            if self.save_individual:
                 self._save_policy(policy_data)
 
-            # Be respectful - add delay between requests
-            time.sleep(2)
-
         return policies
 
     def _save_policy(self, policy_data: Dict):
@@ -209,8 +360,9 @@ class UHCScraper:
         filename = f"{policy_data['policy_id']}.json"
         filepath = self.output_dir / filename
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(policy_data, f, indent=2, ensure_ascii=False)
+        # orjson writes UTF-8 bytes directly; compact output (~half the size of indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(policy_data))
 
         print(f"  Saved to: {filepath}")
 
@@ -218,8 +370,10 @@ class UHCScraper:
         """Save all policies to a single JSON file"""
         filepath = self.output_dir / filename
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(policies, f, indent=2, ensure_ascii=False)
+        # Serialize once, then a single buffered write (compact; the loaders stream it with ijson)
+        data = orjson.dumps(policies)
+        with open(filepath, 'wb', buffering=1 << 20) as f:
+            f.write(data)
 
         print(f"\n✅ Saved {len(policies)} policies to: {filepath}")
 
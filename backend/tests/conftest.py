@@ -3,46 +3,215 @@ Pytest fixtures for integration tests
 """
 import pytest
 import os
+import re
 import sys
 from pathlib import Path
-from fastapi.testclient import TestClient
+from types import SimpleNamespace
+import pytest_asyncio
+from pytest_asyncio import is_async_test
+from httpx import ASGITransport, AsyncClient
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.config import settings
+
+# Set INTEGRATION_LIVE=1 to run against the real LLM proxy and ChromaDB data
+INTEGRATION_LIVE = os.environ.get("INTEGRATION_LIVE") == "1"
+
+MOCK_PROVIDERS = ["UHC", "AETNA", "CIGNA"]
+MOCK_ANSWER = (
+    "Bariatric surgery is covered when the patient meets the BMI coverage criteria "
+    "in the policy and prior authorization is obtained."
+)
+MOCK_EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+# Built once at import; the edge cases track the configured question length limits
+SAMPLE_QUESTIONS = {
+    "valid_medical": "What are the coverage criteria for bariatric surgery?",
+    "valid_short": "Is MRI covered?",
+    "valid_long": "What is the prior authorization process for knee replacement surgery in patients with osteoarthritis?",
+    "edge_empty": "",
+    "edge_whitespace": "   ",
+    "edge_too_long": "x" * (settings.MAX_QUESTION_LENGTH + 1),
+    "edge_non_medical": "What is the capital of France?",
+    "edge_gibberish": "asdfghjkl qwerty",
+}
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "integration_fake: relies on the in-memory fakes (skipped with INTEGRATION_LIVE=1)"
+    )
+
+def pytest_collection_modifyitems(config, items):
+    # Async tests share the event loop of the session-scoped async client
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+    if not INTEGRATION_LIVE:
+        return
+    skip_fake = pytest.mark.skip(reason="needs the in-memory fakes (INTEGRATION_LIVE=1)")
+    for item in items:
+        if "integration_fake" in item.keywords:
+            item.add_marker(skip_fake)
+
+class FakeCollection:
+    """In-memory stand-in for a ChromaDB collection with fixed results"""
+
+    def __init__(self, name, providers):
+        self.name = name
+        self.providers = providers
+
+    def count(self):
+        return len(self.providers)
+
+    def get(self, include=None, **kwargs):
+        return {"metadatas": [{"provider": provider} for provider in self.providers]}
+
+    def query(self, query_embeddings=None, n_results=5, where=None, **kwargs):
+        provider = (where or {}).get("provider", self.providers[0])
+        return {
+            "ids": [[f"{provider}_TEST-001_chunk_0"]],
+            "documents": [[
+                f"{provider} bariatric surgery coverage criteria: BMI of 40 or greater, "
+                "or 35 or greater with comorbidities. Prior authorization is required."
+            ]],
+            "metadatas": [[{
+                "policy_id": "TEST-001",
+                "title": "Bariatric Surgery",
+                "source_url": "https://example.com/policies/TEST-001",
+                "provider": provider,
+            }]],
+            "distances": [[0.1]],
+        }
+
+class FakeChromaClient:
+    """Shared collection plus one dedicated collection per provider"""
+
+    def __init__(self, collection_name):
+        self.collections = {collection_name: FakeCollection(collection_name, MOCK_PROVIDERS)}
+        for provider in MOCK_PROVIDERS:
+            name = f"{collection_name}__{provider}"
+            self.collections[name] = FakeCollection(name, [provider])
+
+    def list_collections(self):
+        return list(self.collections.values())
+
+    def get_collection(self, name):
+        return self.collections[name]
+
+class FakeLLMClient:
+    """
+    OpenAI-compatible client returning MOCK_ANSWER (plain or streamed)
+
+    Stands in for the whole client rather than mocking its HTTP transport, so
+    no request is built or response parsed. The responses are built once and
+    shared, since the app only reads them.
+    """
+
+    COMPLETION = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=MOCK_ANSWER))])
+    STREAM_CHUNKS = tuple(
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+        for token in re.findall(r"\S+\s*", MOCK_ANSWER)  # Tokens keep their trailing space
+    )
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, stream=False, **kwargs):
+        if stream:
+            return iter(self.STREAM_CHUNKS)
+        return self.COMPLETION
+
+    def close(self):
+        pass
+
 @pytest.fixture(scope="session")
-def test_env():
-    """Set up test environment variables"""
-    os.environ["APP_ENV"] = "testing"
-    os.environ["DEBUG"] = "True"
-    os.environ["CHROMA_PERSIST_DIRECTORY"] = str(Path(__file__).parent.parent / "chroma_data")
-    os.environ["ENABLE_CACHE"] = "False"  # Disable cache for tests
+def test_env(tmp_path_factory):
+    """
+    Set up the test configuration
+
+    Settings are already loaded at import, so each override is applied to
+    the live settings object as well as the environment.
+    """
+    overrides = {
+        "APP_ENV": "testing",
+        "DEBUG": True,
+        "CHROMA_PERSIST_DIRECTORY": str(Path(__file__).parent.parent / "chroma_data"),
+        "ENABLE_CACHE": False,  # Disable cache for tests
+        # Per-worker feedback log, so parallel xdist workers never share a file
+        "FEEDBACK_LOG_PATH": str(tmp_path_factory.mktemp("feedback") / "feedback.jsonl"),
+    }
+    for name, value in overrides.items():
+        os.environ[name] = str(value)
+        setattr(settings, name, value)
     yield
     # Cleanup after all tests
 
-@pytest.fixture(scope="module")
-def client(test_env):
-    """Create FastAPI test client"""
+@pytest.fixture(scope="session", autouse=True)
+def _mock_backends(test_env):
+    """
+    Replace the LLM, ChromaDB and embedding model with in-memory fakes
+
+    Patches the app's service initializers, so the lifespan wires up the
+    fakes and every request runs the real endpoint code without network or
+    model inference. Skipped when INTEGRATION_LIVE=1.
+    """
+    if INTEGRATION_LIVE:
+        yield
+        return
+
+    from app import main
+
+    with pytest.MonkeyPatch.context() as mp:
+        def init_llm():
+            mp.setattr(main, "llm_manager", None)
+            mp.setattr(main, "fallback_llm_client", FakeLLMClient())
+
+        def init_chroma():
+            client = FakeChromaClient(settings.CHROMA_COLLECTION_NAME)
+            mp.setattr(main, "chroma_client", client)
+            mp.setattr(main, "policy_collection", client.get_collection(settings.CHROMA_COLLECTION_NAME))
+
+        def init_embeddings():
+            mp.setattr(main, "embedding_function", lambda texts: [[0.1] * MOCK_EMBEDDING_DIM for _ in texts])
+
+        mp.setattr(main, "_init_llm", init_llm)
+        mp.setattr(main, "_init_chroma", init_chroma)
+        mp.setattr(main, "_init_embeddings", init_embeddings)
+        yield
+
+@pytest_asyncio.fixture(scope="session")
+async def client(test_env):
+    """
+    Create an async HTTP client bound directly to the ASGI app
+
+    Shared by every test in the session. Requests go straight into the app
+    in-process (no TestClient thread portal); the app lifespan (LLM,
+    ChromaDB and embedding initialization) runs once around the session,
+    followed by a warm-up request so the first test doesn't pay cold-start
+    costs (model load, first Chroma query, first LLM connection).
+    """
     from app.main import app
-    client = TestClient(app)
-    yield client
-    client.close()
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            await _warm_up(client)
+            yield client
 
-@pytest.fixture(scope="module")
+async def _warm_up(client):
+    """Exercise the /api/ask path once (result ignored) and the health check"""
+    await client.post("/api/ask", json={"question": SAMPLE_QUESTIONS["valid_medical"], "provider": "UHC"})
+    await client.get("/api/health")
+
+@pytest.fixture(scope="session")
 def sample_questions():
     """Sample questions for testing"""
-    return {
-        "valid_medical": "What are the coverage criteria for bariatric surgery?",
-        "valid_short": "Is MRI covered?",
-        "valid_long": "What is the prior authorization process for knee replacement surgery in patients with osteoarthritis?",
-        "edge_empty": "",
-        "edge_whitespace": "   ",
-        "edge_too_long": "x" * 501,
-        "edge_non_medical": "What is the capital of France?",
-        "edge_gibberish": "asdfghjkl qwerty",
-    }
+    return SAMPLE_QUESTIONS
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def expected_providers():
     """Expected insurance providers"""
     return ["UHC", "AETNA", "CIGNA"]
@@ -1 +1,20 @@
 # Integration tests package
+from functools import lru_cache
+
+import orjson
+
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+@lru_cache(maxsize=None)
+def ask_body(question, provider):
+    """Pre-serialized /api/ask body (built once per question/provider pair)"""
+    return orjson.dumps({"question": question, "provider": provider})
+
+def assert_ask_ok(data, provider="UHC"):
+    """Check an /api/ask response body answers for the expected provider"""
+    assert len(data["answer"]) > 0
+    assert isinstance(data["sources"], list)
+    assert 0.0 <= data["confidence"] <= 1.0
+    assert data["provider"] == provider
+    assert data["cached"] is False  # Answer cache is disabled in tests
@@ -0,0 +1,32 @@
+"""
+Unit tests for the shared policy chunking helpers
+"""
+from data_pipeline._chunking import _join_chunks, _regularize_chunks
+
+class TestJoinChunks:
+    """Test joining adjacent chunks in the merge/fold post-pass"""
+
+    def test_drops_splitter_overlap(self):
+        """Test a repeated run of whole words is kept only once"""
+        first = "Prior authorization is required for bariatric surgery"
+        second = "for bariatric surgery in adults with a BMI over 40."
+        assert _join_chunks(first, second) == (
+            "Prior authorization is required for bariatric surgery in adults with a BMI over 40."
+        )
+
+    def test_keeps_text_sharing_a_letter(self):
+        """Test a single shared letter at the seam is not treated as overlap"""
+        assert _join_chunks("Coverage criteria", "apply to members over 18.") == (
+            "Coverage criteria\napply to members over 18."
+        )
+
+    def test_keeps_text_sharing_a_word_fragment(self):
+        """Test a partial-word match at the seam is not treated as overlap"""
+        first = "Medical review is required"
+        second = "documentation must be submitted"
+        assert _join_chunks(first, second) == f"{first}\n{second}"
+
+    def test_regularize_keeps_merged_text(self):
+        """Test small adjacent chunks merge without losing characters"""
+        chunks = ["Coverage criteria", "apply to members over 18."]
+        assert _regularize_chunks(chunks) == ["Coverage criteria\napply to members over 18."]
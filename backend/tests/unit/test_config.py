@@ -0,0 +1,19 @@
+"""
+Unit tests for settings parsing
+"""
+import pytest
+
+from app.config import Settings
+
+class TestSettings:
+    """Test environment values are parsed like the original os.getenv config"""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("", False),  # Empty value in a .env template
+        ("True", True),
+        ("false", False),
+    ])
+    def test_debug_parsing(self, monkeypatch, value, expected):
+        """Test DEBUG accepts booleans and treats an empty value as False"""
+        monkeypatch.setenv("DEBUG", value)
+        assert Settings().DEBUG is expected
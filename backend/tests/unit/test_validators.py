@@ -0,0 +1,50 @@
+"""
+Unit tests for input validation
+"""
+import pytest
+
+from app.config import settings
+from app.validators import InputValidator
+
+class TestSanitizeInput:
+    """Test input sanitization"""
+
+    def test_length_limits_follow_settings(self, monkeypatch):
+        """Test the length bounds come from settings, like QueryRequest's"""
+        monkeypatch.setattr(settings, "MAX_QUESTION_LENGTH", 20)
+        with pytest.raises(ValueError, match="maximum 20 characters"):
+            InputValidator.sanitize_input("Is bariatric surgery covered?")
+
+class TestMedicalRelevance:
+    """Test keyword-based medical relevance scoring"""
+
+    @pytest.mark.parametrize("question,expected", [
+        ("Is chemotherapy covered?", (True, 1 / 3)),  # 'therapy' inside a word
+        ("Is physiotherapy covered for me?", (True, 1 / 3)),
+        ("Are healthcare claims ok?", (True, 1.0)),  # 'healthcare', 'health', 'claim'
+        ("What is the capital of France?", (False, 0.0)),
+    ])
+    def test_keywords_match_as_substrings(self, question, expected):
+        """Test keywords count wherever they appear, including inside words"""
+        assert InputValidator.is_medical_question(question) == pytest.approx(expected)
+
+    @pytest.mark.parametrize("question", [
+        "Is ſurgery covered by my plan?",  # U+017F long s
+        "Is ınsurance ok for me?",  # U+0131 dotless i
+    ])
+    def test_unicode_case_variants_are_not_keywords(self, question):
+        """Test characters that only case-fold to ASCII don't match (or crash)"""
+        assert InputValidator.is_medical_question(question) == (False, 0.0)
+
+class TestProviderExtraction:
+    """Test detecting the provider mentioned in a question"""
+
+    @pytest.mark.parametrize("question,expected", [
+        ("Does Aetna cover MRI?", "AETNA"),
+        ("Is this covered by United Healthcare?", "UHC"),
+        ("Does cıgna cover MRI?", None),  # U+0131 dotless i only case-folds to 'i'
+        ("Is an MRI covered?", None),
+    ])
+    def test_extract_provider(self, question, expected):
+        """Test provider names are found case-insensitively, without crashing on Unicode"""
+        assert InputValidator.extract_provider(question) == expected